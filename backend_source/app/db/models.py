@@ -1,6 +1,6 @@
 # backend_source/app/db/models.py
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -11,6 +11,17 @@ engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 )
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        # only takes effect on a fresh DB file; lets retention hand freed pages back in small steps
+        cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL lets API reads continue while the scheduler/retention jobs write
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -19,10 +30,36 @@ class ScheduledPost(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     platform = Column(String(50))
+    account_id = Column(String(128), nullable=True, index=True)  # target SocialAccount.account_id
     caption = Column(Text)
     scheduled_time = Column(DateTime)
-    status = Column(String(20), default="pending")  # pending, posted, cancelled
+    status = Column(String(20), default="pending")  # pending, publishing, posted, dead_letter, cancelled
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)  # retry backoff / rate-limit deferral
+    last_error = Column(Text, nullable=True)
+    external_id = Column(String(255), nullable=True)   # id returned by the platform
+    posted_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(64), nullable=True)    # dispatcher that holds the 'publishing' claim
+    claimed_at = Column(DateTime, nullable=True)       # claim lease start; expired leases are re-queued
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # due-post scan: status = 'pending' AND scheduled_time <= now
+        Index("ix_scheduled_posts_status_time", "status", "scheduled_time"),
+    )
+
+def _add_missing_columns(table):
+    """create_all never alters existing tables; add columns introduced since the DB was created."""
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for col in table.columns:
+            if col.name not in existing:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(dialect=engine.dialect)}"
+                )
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(ScheduledPost.__table__)
+    for index in ScheduledPost.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
\ No newline at end of file
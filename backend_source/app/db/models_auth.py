@@ -1,6 +1,6 @@
 # backend_source/app/db/models_auth.py
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 import os
 
@@ -44,7 +44,17 @@ class AnalyticsSnapshot(Base):
     reach = Column(Integer, nullable=True)
     watch_time = Column(Integer, nullable=True)
     raw = Column(JSON, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # account-scoped time-range scans (history, series, trends)
+        Index("ix_analytics_platform_account_ts", "platform", "account_id", "timestamp"),
+        # newest-per-platform lookups (latest, overview, cache validators)
+        Index("ix_analytics_platform_ts", "platform", "timestamp"),
+    )
 
 def init_auth_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist, so add new ones explicitly
+    for index in AnalyticsSnapshot.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
\ No newline at end of file
@@ -3,7 +3,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.background_jobs import start_scheduler
-from app.routes import ai_tools, scheduler, oauth, analytics
+from app.services.metrics import PrometheusMiddleware, instrument_engine
+from app.services.http_cache import SelectiveGZipMiddleware
+from app.db.models import engine
+from app.routes import ai_tools, scheduler, oauth, analytics, metrics
 
 # ✅ create FastAPI instance before adding routers
 app = FastAPI(title="VidReacher Labs API")
@@ -17,11 +20,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ compress large responses (incl. streamed csv/ndjson exports) for clients sending Accept-Encoding: gzip
+app.add_middleware(SelectiveGZipMiddleware, skip=analytics.skip_gzip, minimum_size=1024, compresslevel=5)
+
+# ✅ request latency histograms + DB query timing for /metrics
+app.add_middleware(PrometheusMiddleware)
+instrument_engine(engine)
+
 # ✅ include routers after app is defined
 app.include_router(ai_tools.router)
 app.include_router(scheduler.router)
 app.include_router(oauth.router)
 app.include_router(analytics.router)
+app.include_router(metrics.router)
 
 # ✅ base route to verify backend is live
 @app.get("/")
@@ -15,6 +15,7 @@ class CaptionRequest(BaseModel):
 class HashtagRequest(BaseModel):
     text: str
     max_tags: int = 8
+    use_provider: bool = False  # also ask the AI provider (slower); the local index answers on its own
 
 class SummaryRequest(BaseModel):
     transcript: str
@@ -31,7 +32,7 @@ def generate_caption(req: CaptionRequest):
 def generate_tags(req: HashtagRequest):
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
-    tags = ai_engine.generate_hashtags(req.text, max_tags=req.max_tags)
+    tags = ai_engine.generate_hashtags(req.text, max_tags=req.max_tags, use_provider=req.use_provider)
     return {"tags": tags}
 
 @router.post("/summary")
@@ -1,65 +1,170 @@
 # backend_source/app/routes/analytics.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
+from sqlalchemy import func
 from app.db.models_auth import SessionLocal, AnalyticsSnapshot
-from typing import List
+from app.services import analytics_export, analytics_series, trends
+from app.services.analytics_fetchers import PLATFORM_PROVIDER
+from app.services.http_cache import make_etag, conditional_json
+from typing import List, Optional
+from urllib.parse import parse_qs
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 @router.get("/{platform}/latest")
-def latest(platform: str):
+def latest(platform: str, request: Request):
     db = SessionLocal()
     try:
-        row = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.platform==platform).order_by(AnalyticsSnapshot.timestamp.desc()).first()
-        if not row:
+        # validator: newest snapshot's id + timestamp (index-only lookup); the full row is loaded only on a miss
+        head = db.query(AnalyticsSnapshot.id, AnalyticsSnapshot.timestamp).filter(AnalyticsSnapshot.platform==platform).order_by(AnalyticsSnapshot.timestamp.desc()).first()
+        if not head:
             raise HTTPException(status_code=404, detail="No metrics found")
-        return {
-            "platform": row.platform,
-            "account_id": row.account_id,
-            "followers": row.followers,
-            "views": row.views,
-            "likes": row.likes,
-            "comments": row.comments,
-            "impressions": row.impressions,
-            "reach": row.reach,
-            "watch_time": row.watch_time,
-            "timestamp": row.timestamp,
-            "raw": row.raw
-        }
+        return conditional_json(request, make_etag("latest", platform, head.id, head.timestamp), head.timestamp,
+                                lambda: _latest_body(db.get(AnalyticsSnapshot, head.id)))
     finally:
         db.close()
 
+def _latest_body(row: AnalyticsSnapshot):
+    return {
+        "platform": row.platform,
+        "account_id": row.account_id,
+        "followers": row.followers,
+        "views": row.views,
+        "likes": row.likes,
+        "comments": row.comments,
+        "impressions": row.impressions,
+        "reach": row.reach,
+        "watch_time": row.watch_time,
+        "timestamp": row.timestamp,
+        "raw": row.raw
+    }
+
 @router.get("/{platform}/history")
-def history(platform: str, days: int = 30):
+def history(platform: str, request: Request, days: int = 30, account_id: Optional[str] = None):
     db = SessionLocal()
     try:
         cutoff = datetime.utcnow() - timedelta(days=days)
-        rows = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.platform==platform, AnalyticsSnapshot.timestamp >= cutoff).order_by(AnalyticsSnapshot.timestamp).all()
-        return [
-            {
-                "timestamp": r.timestamp,
-                "followers": r.followers,
-                "views": r.views,
-                "impressions": r.impressions,
-                "raw": r.raw
-            } for r in rows
-        ]
+        filters = [AnalyticsSnapshot.platform==platform, AnalyticsSnapshot.timestamp >= cutoff]
+        if account_id:
+            filters.append(AnalyticsSnapshot.account_id==account_id)
+        # validator over the window: a new snapshot bumps max(id), one ageing out or pruned changes the count,
+        # and retention compacting raw payloads changes count(raw)
+        count, raw_count, max_id, max_ts = db.query(
+            func.count(AnalyticsSnapshot.id), func.count(AnalyticsSnapshot.raw),
+            func.max(AnalyticsSnapshot.id), func.max(AnalyticsSnapshot.timestamp)
+        ).filter(*filters).one()
+        etag = make_etag("history", platform, account_id, days, count, raw_count, max_id, max_ts)
+
+        def build():
+            rows = db.query(AnalyticsSnapshot).filter(*filters).order_by(AnalyticsSnapshot.timestamp).all()
+            return [
+                {
+                    "timestamp": r.timestamp,
+                    "followers": r.followers,
+                    "views": r.views,
+                    "impressions": r.impressions,
+                    "raw": r.raw
+                } for r in rows
+            ]
+        return conditional_json(request, etag, max_ts, build)
+    finally:
+        db.close()
+
+def _series(platform: str, accounts: Optional[List[str]], days: int, bucket: str):
+    if bucket not in analytics_series.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(analytics_series.BUCKETS)}")
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        return analytics_series.bucketed_series(db, platform, accounts, cutoff, bucket)
+    finally:
+        db.close()
+
+@router.get("/{platform}/accounts/{account_id}/series")
+def account_series(platform: str, account_id: str, days: int = 30, bucket: str = "day"):
+    """Time-bucketed last/avg/delta per metric for one account, aggregated in SQL."""
+    series = _series(platform, [account_id], days, bucket)
+    return {"platform": platform, "account_id": account_id, "bucket": bucket, "series": series.get(account_id, [])}
+
+@router.get("/{platform}/series")
+def multi_account_series(platform: str, accounts: Optional[str] = None, days: int = 30, bucket: str = "day"):
+    """Same as the account series, for a comma-separated list of accounts (default: all) keyed by account."""
+    account_list = [a for a in accounts.split(",") if a] if accounts else None
+    return {"platform": platform, "bucket": bucket, "series": _series(platform, account_list, days, bucket)}
+
+@router.get("/{platform}/trends")
+def account_trends(platform: str, metric: str = "followers", days: int = 30,
+                   accounts: Optional[str] = None, include_series: bool = False):
+    """
+    Growth rates, 7/28-day moving averages, velocity and spike days per account, sorted by 7-day growth.
+    Computed server-side over all accounts at once and cached per account until its next snapshot.
+    """
+    if platform not in PLATFORM_PROVIDER:
+        raise HTTPException(status_code=404, detail=f"Unknown platform {platform}")
+    if metric not in trends.TREND_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(trends.TREND_METRICS)}")
+    if not 1 <= days <= 365:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 365")
+    account_list = [a for a in accounts.split(",") if a] if accounts else None
+    db = SessionLocal()
+    try:
+        rows = trends.account_trends(db, platform, metric, days, account_list, include_series)
+        return {"platform": platform, "metric": metric, "days": days, "accounts": rows}
     finally:
         db.close()
 
 @router.get("/overview")
-def overview():
+def overview(request: Request):
     db = SessionLocal()
     try:
         # quick KPIs: latest followers per platform
         platforms = ["instagram", "youtube", "facebook"]
         result = {}
         for p in platforms:
-            r = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.platform==p).order_by(AnalyticsSnapshot.timestamp.desc()).first()
-            if r:
-                result[p] = {"followers": r.followers, "views": r.views, "timestamp": r.timestamp}
-            else:
-                result[p] = None
-        return result
+            r = db.query(AnalyticsSnapshot.id, AnalyticsSnapshot.followers, AnalyticsSnapshot.views, AnalyticsSnapshot.timestamp).filter(AnalyticsSnapshot.platform==p).order_by(AnalyticsSnapshot.timestamp.desc()).first()
+            result[p] = r
+        newest = [r for r in result.values() if r]
+        etag = make_etag("overview", *[(p, r.id if r else None) for p, r in result.items()])
+        last_modified = max((r.timestamp for r in newest), default=None)
+        return conditional_json(request, etag, last_modified, lambda: {
+            p: {"followers": r.followers, "views": r.views, "timestamp": r.timestamp} if r else None
+            for p, r in result.items()
+        })
     finally:
         db.close()
+
+@router.get("/export")
+def export(
+    format: str = "csv",
+    platforms: Optional[str] = None,
+    accounts: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_raw: bool = False,
+):
+    """
+    Stream snapshots as csv / ndjson / parquet.
+    - platforms, accounts: comma-separated filters (default: all)
+    - start, end: ISO timestamps, end exclusive
+    Rows are read in chunks from a server-side cursor, so memory stays flat for any export size.
+    """
+    media_type = analytics_export.FORMATS.get(format)
+    if media_type is None:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(analytics_export.FORMATS)}")
+    if format == "parquet" and not analytics_export.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+    body = analytics_export.export_snapshots(
+        format,
+        platforms=[p for p in platforms.split(",") if p] if platforms else None,
+        accounts=[a for a in accounts.split(",") if a] if accounts else None,
+        start=start,
+        end=end,
+        include_raw=include_raw,
+    )
+    headers = {"Content-Disposition": f'attachment; filename="analytics_snapshots.{format}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+def skip_gzip(scope) -> bool:
+    """Parquet exports are already zstd-compressed internally; gzipping them again only costs CPU."""
+    return scope["path"] == "/analytics/export" and parse_qs(scope["query_string"].decode()).get("format") == ["parquet"]
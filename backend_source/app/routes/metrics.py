@@ -0,0 +1,22 @@
+# backend_source/app/routes/metrics.py
+from fastapi import APIRouter, Response
+from app.services.metrics import render_latest
+from app.services.circuit_breaker import breaker_states, CLOSED
+from app.services.fetch_scheduler import fetch_scheduler
+
+router = APIRouter(tags=["Ops"])
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+@router.get("/health/providers")
+def provider_health():
+    """Circuit breaker state per provider/endpoint and the accounts waiting on each open breaker."""
+    breakers = breaker_states()
+    deferred = fetch_scheduler.deferred()
+    for b in breakers:
+        b["deferred_accounts"] = deferred.get(f"{b['provider']}:{b['endpoint']}", 0)
+    degraded = any(b["state"] != CLOSED for b in breakers)
+    return {"status": "degraded" if degraded else "ok", "breakers": breakers}
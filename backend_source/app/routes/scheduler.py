@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from datetime import datetime
+import os
+import csv
+import io
+import codecs
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from app.db.models import SessionLocal, ScheduledPost, init_db
+from app.services.background_jobs import notify_posts_scheduled
 
 router = APIRouter(prefix="/scheduler", tags=["Scheduler"])
 
+# Rows per multi-row INSERT, sized so 7 bound params per row fit SQLite's default variable
+# limit of 999 (raised to 32766 only in 3.32+); override upward on newer SQLite or Postgres
+SQLITE_MAX_VARIABLES = 999
+BULK_PARAMS_PER_ROW = 7
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", str(SQLITE_MAX_VARIABLES // BULK_PARAMS_PER_ROW)))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+
+logger = logging.getLogger("VidReacherScheduler")
+
 # Initialize DB
 init_db()
 
@@ -20,19 +39,133 @@ class ScheduleRequest(BaseModel):
     platform: str
     caption: str
     scheduled_time: datetime  # ISO format e.g. 2025-11-09T14:30:00Z
+    account_id: Optional[str] = None  # connected account to publish from
+
+def _utc_naive(ts: datetime) -> datetime:
+    # the dispatcher compares against datetime.utcnow(), so store naive UTC
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
 
 @router.post("/create")
 def create_schedule(req: ScheduleRequest, db: Session = Depends(get_db)):
     post = ScheduledPost(
         platform=req.platform,
+        account_id=req.account_id,
         caption=req.caption,
-        scheduled_time=req.scheduled_time
+        scheduled_time=_utc_naive(req.scheduled_time)
     )
     db.add(post)
     db.commit()
     db.refresh(post)
+    notify_posts_scheduled(post.scheduled_time)
     return {"message": "Post scheduled successfully", "id": post.id}
 
+def _split_complete_records(buf: str):
+    """Split CSV text after the last newline that is outside a quoted field."""
+    in_quotes = False
+    cut = -1
+    for i, ch in enumerate(buf):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == "\n" and not in_quotes:
+            cut = i
+    return buf[:cut + 1], buf[cut + 1:]
+
+async def _read_csv_rows(request: Request):
+    """Parse a streamed CSV body chunk by chunk into dicts keyed by the header row."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    header = None
+    buf = ""
+    rows = []
+
+    def consume(text):
+        nonlocal header
+        for values in csv.reader(io.StringIO(text)):
+            if not values or not any(v.strip() for v in values):
+                continue
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            rows.append(dict(zip(header, values)))
+
+    async for chunk in request.stream():
+        buf += decoder.decode(chunk)
+        complete, buf = _split_complete_records(buf)
+        if complete:
+            consume(complete)
+        if len(rows) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per import")
+    buf += decoder.decode(b"", final=True)
+    if buf.strip():
+        consume(buf)
+    return rows
+
+@router.post("/bulk")
+async def bulk_schedule(request: Request, all_or_nothing: bool = False):
+    """
+    Import many posts at once from a JSON array or a CSV upload (Content-Type: text/csv,
+    header row with platform,caption,scheduled_time[,account_id]).
+    Every row is validated before anything is written; errors are reported per row (1-based).
+    Valid rows are stored with one multi-row INSERT per chunk, all in a single transaction:
+    either every valid row is stored or, on a database error, none is.
+    - all_or_nothing: store nothing if any row is invalid
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        items = await _read_csv_rows(request)
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or text/csv")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    if len(items) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per import")
+
+    now = datetime.utcnow()
+    valid: List[dict] = []
+    errors = []
+    for i, item in enumerate(items, start=1):
+        if isinstance(item, dict) and item.get("account_id") == "":
+            item["account_id"] = None  # empty CSV cell
+        try:
+            req = ScheduleRequest.model_validate(item)
+        except ValidationError as e:
+            errors.append({"row": i, "errors": [
+                {"field": ".".join(str(p) for p in err["loc"]), "message": err["msg"]} for err in e.errors()
+            ]})
+            continue
+        valid.append({
+            "platform": req.platform,
+            "account_id": req.account_id,
+            "caption": req.caption,
+            "scheduled_time": _utc_naive(req.scheduled_time),
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now,
+        })
+
+    if errors and all_or_nothing:
+        return {"inserted": 0, "failed": len(errors), "errors": errors}
+    await run_in_threadpool(_insert_posts, valid)
+    return {"inserted": len(valid), "failed": len(errors), "errors": errors}
+
+def _insert_posts(rows: List[dict]):
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        for start in range(0, len(rows), BULK_CHUNK_ROWS):
+            db.execute(insert(ScheduledPost).values(rows[start:start + BULK_CHUNK_ROWS]))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Bulk schedule import failed, nothing stored: {e}")
+        raise HTTPException(status_code=500, detail="Import failed; no rows were stored")
+    finally:
+        db.close()
+    notify_posts_scheduled(min(r["scheduled_time"] for r in rows))
+
 @router.get("/list")
 def list_schedules(db: Session = Depends(get_db)):
     posts = db.query(ScheduledPost).order_by(ScheduledPost.scheduled_time).all()
@@ -40,9 +173,12 @@ def list_schedules(db: Session = Depends(get_db)):
         {
             "id": p.id,
             "platform": p.platform,
+            "account_id": p.account_id,
             "caption": p.caption,
             "scheduled_time": p.scheduled_time,
-            "status": p.status
+            "status": p.status,
+            "attempts": p.attempts,
+            "last_error": p.last_error
         }
         for p in posts
     ]
@@ -1,25 +1,24 @@
 # backend_source/app/services/ai_engine_v2.py
 import os
 import re
+import time
 import random
 import logging
 from typing import List, Dict, Optional
+from app.services.metrics import PROVIDER_SECONDS, PROVIDER_FAILURES
+from app.services import hashtag_index
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")  # e.g. a local stub for benchmarks
 
 #Simple helper: clean text and extract keywords
 def _clean_text(text: str) -> str:
     return re.sub(r"\s+", " ", text.strip())
 
 def _extract_keywords(text: str, top_n: int = 6) -> List[str]:
-    # Very simple keyword heuristic: top frequent non-stopwords
-    stopwords = set([
-        "the","and","or","in","on","with","a","an","of","for","to","is","are","that","this","it","as","by","from"
-    ])
-    words = re.findall(r"[A-Za-z0-9']{2,}", text.lower())
+    # Very simple keyword heuristic: top frequent non-stopwords, tokenized like the hashtag index
     freq = {}
-    for w in words:
-        if w in stopwords: continue
+    for w in hashtag_index.tokenize(text):
         freq[w] = freq.get(w, 0) + 1
     items = sorted(freq.items(), key=lambda x: (-x[1], x[0]))
     return [w for w,_ in items][:top_n]
@@ -71,9 +70,18 @@ def _openai_generate(prompt: str, max_tokens: int = 200) -> Optional[str]:
         # Lazy import so we don't force dependency
         import openai
         openai.api_key = OPENAI_API_KEY
-        resp = openai.Completion.create(
-            engine="gpt-4o-mini", prompt=prompt, max_tokens=max_tokens, temperature=0.8
-        )
+        if OPENAI_API_BASE:
+            openai.api_base = OPENAI_API_BASE
+        start = time.perf_counter()
+        try:
+            resp = openai.Completion.create(
+                engine="gpt-4o-mini", prompt=prompt, max_tokens=max_tokens, temperature=0.8
+            )
+        except Exception:
+            PROVIDER_FAILURES.labels("openai", "completion").inc()
+            raise
+        finally:
+            PROVIDER_SECONDS.labels("openai", "completion").observe(time.perf_counter() - start)
         if resp and isinstance(resp.choices, list) and resp.choices:
             return resp.choices[0].text.strip()
     except Exception as e:
@@ -91,20 +99,33 @@ def generate_caption(text: str, tone: str = "neutral", length: str = "short", pl
     # fallback:
     return _local_generate_caption(text, tone=tone, length=length, platform=platform)
 
-def generate_hashtags(text: str, max_tags: int = 8) -> List[str]:
+def _merge_tags(*groups: List[str], max_tags: int) -> List[str]:
+    out, seen = [], set()
+    for group in groups:
+        for tag in group:
+            if tag.lower() not in seen:
+                seen.add(tag.lower())
+                out.append(tag)
+    return out[:max_tags]
+
+def generate_hashtags(text: str, max_tags: int = 8, use_provider: bool = False) -> List[str]:
+    """Engagement-ranked tags from the local hashtag index, topped up from the text's own keywords.
+    With use_provider (and a key configured) provider suggestions are merged in after the indexed ones."""
     text = _clean_text(text)
-    keywords = _extract_keywords(text, top_n=max_tags*2)
-    tags = _format_hashtags(keywords, max_tags=max_tags)
-    # If provider present, try to get trending tag suggestions
-    if OPENAI_API_KEY:
+    hashtag_index.ensure_loaded()
+    indexed = hashtag_index.hashtag_index.suggest(text, max_tags=max_tags)
+    provider = []
+    if use_provider and OPENAI_API_KEY:
         prompt = f"Suggest up to {max_tags} relevant hashtags (no explanation) for this text:\n\n{text}\n\nReturn only hashtags separated by commas."
         out = _openai_generate(prompt, max_tokens=80)
         if out:
             # parse possible comma separated result
-            cand = re.findall(r"#\w+", out)
-            if cand:
-                return cand[:max_tags]
-    return tags
+            provider = re.findall(r"#\w+", out)
+    if len(indexed) + len(provider) >= max_tags:
+        return _merge_tags(indexed, provider, max_tags=max_tags)
+    keywords = _extract_keywords(text, top_n=max_tags*2)
+    local = _format_hashtags(keywords, max_tags=max_tags)
+    return _merge_tags(indexed, provider, local, max_tags=max_tags)
 
 def summarize_video(transcript: str, max_sentences: int = 3) -> str:
     t = _clean_text(transcript)
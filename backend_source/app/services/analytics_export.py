@@ -0,0 +1,158 @@
+# backend_source/app/services/analytics_export.py
+import io
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+from sqlalchemy import select
+from app.db.models_auth import SessionLocal, AnalyticsSnapshot
+
+# Rows fetched from the DB cursor (and emitted) per chunk
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+EXPORT_COLUMNS = [
+    "id", "platform", "account_id", "timestamp", "followers", "views", "likes",
+    "comments", "impressions", "reach", "watch_time",
+]
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _utc_naive(ts: Optional[datetime]) -> Optional[datetime]:
+    # snapshot timestamps are stored as naive UTC; an offset in the query string must not shift the window
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts and ts.tzinfo else ts
+
+
+def _build_query(platforms: Optional[List[str]], accounts: Optional[List[str]],
+                 start: Optional[datetime], end: Optional[datetime], include_raw: bool):
+    cols = [getattr(AnalyticsSnapshot, c) for c in EXPORT_COLUMNS]
+    if include_raw:
+        cols.append(AnalyticsSnapshot.raw)
+    q = select(*cols)
+    if platforms:
+        q = q.where(AnalyticsSnapshot.platform.in_(platforms))
+    if accounts:
+        q = q.where(AnalyticsSnapshot.account_id.in_(accounts))
+    if start:
+        q = q.where(AnalyticsSnapshot.timestamp >= start)
+    if end:
+        q = q.where(AnalyticsSnapshot.timestamp < end)
+    return q.order_by(AnalyticsSnapshot.timestamp, AnalyticsSnapshot.id)
+
+
+def _iter_chunks(query) -> Iterator[list]:
+    """Yield lists of rows from a server-side cursor, EXPORT_CHUNK_ROWS at a time."""
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS))
+        for chunk in result.partitions():
+            yield chunk
+    finally:
+        db.close()
+
+
+def _csv_stream(chunks, columns) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in chunks:
+        for row in chunk:
+            values = list(row)
+            values[3] = values[3].isoformat() if values[3] else None
+            if len(values) > len(EXPORT_COLUMNS):
+                values[-1] = json.dumps(values[-1]) if values[-1] is not None else None
+            writer.writerow(values)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _ndjson_stream(chunks, columns) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            d = dict(zip(columns, row))
+            d["timestamp"] = d["timestamp"].isoformat() if d["timestamp"] else None
+            lines.append(json.dumps(d, default=str))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting bytes so parquet output can be streamed per row group."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf.extend(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = bytes(self._buf)
+        self._buf.clear()
+        return out
+
+
+def _parquet_stream(chunks, columns) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [
+        ("id", pa.int64()), ("platform", pa.string()), ("account_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+    ] + [(c, pa.int64()) for c in EXPORT_COLUMNS[4:]]
+    if len(columns) > len(EXPORT_COLUMNS):
+        fields.append(("raw", pa.string()))
+    schema = pa.schema(fields)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in chunks:
+            cols = list(zip(*chunk)) if chunk else [[] for _ in columns]
+            arrays = {name: list(values) for name, values in zip(columns, cols)}
+            if "raw" in arrays:
+                arrays["raw"] = [json.dumps(v) if v is not None else None for v in arrays["raw"]]
+            writer.write_table(pa.Table.from_pydict(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def export_snapshots(fmt: str, platforms: Optional[List[str]] = None, accounts: Optional[List[str]] = None,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     include_raw: bool = False) -> Iterator[bytes]:
+    """Stream matching snapshots encoded as csv / ndjson / parquet, chunk by chunk."""
+    columns = EXPORT_COLUMNS + (["raw"] if include_raw else [])
+    chunks = _iter_chunks(_build_query(platforms, accounts, _utc_naive(start), _utc_naive(end), include_raw))
+    if fmt == "csv":
+        return _csv_stream(chunks, columns)
+    if fmt == "ndjson":
+        return _ndjson_stream(chunks, columns)
+    if fmt == "parquet":
+        return _parquet_stream(chunks, columns)
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -1,11 +1,67 @@
 # backend_source/app/services/analytics_fetchers.py
+import os
+import time
 import requests
 from datetime import datetime
 from app.db.models_auth import SessionLocal, AnalyticsSnapshot, SocialAccount
+from app.services.metrics import FETCH_SECONDS, FETCH_TOTAL, PROVIDER_SECONDS, PROVIDER_FAILURES
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
 import logging
 
 logger = logging.getLogger("AnalyticsFetchers")
 
+# Overridable so benchmarks can point the fetchers at a local stub server
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com/v16.0")
+YOUTUBE_API_BASE = os.getenv("YOUTUBE_API_BASE", "https://www.googleapis.com/youtube/v3")
+
+# Upstream API behind each platform; instagram and facebook share the Graph API breaker
+PLATFORM_PROVIDER = {"instagram": "graph", "facebook": "graph", "youtube": "youtube"}
+
+class ProviderHTTPError(Exception):
+    """A provider answered with a non-2xx status; nothing should be stored for that fetch."""
+
+    def __init__(self, provider: str, endpoint: str, status_code: int):
+        super().__init__(f"{provider}:{endpoint} returned HTTP {status_code}")
+        self.status_code = status_code
+
+def provider_get(provider: str, endpoint: str, url: str, **kwargs):
+    """requests.get through the provider-wide and per-endpoint circuit breakers.
+
+    Raises CircuitOpenError without touching the network while either breaker is open,
+    and ProviderHTTPError for any non-2xx answer so error bodies are never stored as snapshots.
+    Timeouts, connection errors, 429 and 5xx count as breaker failures; other responses
+    (including 4xx for a bad token) count as the provider being healthy.
+    """
+    provider_cb = get_breaker(provider)
+    endpoint_cb = get_breaker(provider, endpoint)
+    provider_cb.allow()
+    try:
+        endpoint_cb.allow()
+    except CircuitOpenError:
+        provider_cb.release()
+        raise
+    start = time.perf_counter()
+    try:
+        r = requests.get(url, **kwargs)
+    except Exception as e:
+        latency = time.perf_counter() - start
+        PROVIDER_FAILURES.labels(provider, endpoint).inc()
+        for cb in (endpoint_cb, provider_cb):
+            cb.record_failure(latency, type(e).__name__)
+        raise
+    latency = time.perf_counter() - start
+    PROVIDER_SECONDS.labels(provider, endpoint).observe(latency)
+    if r.status_code == 429 or r.status_code >= 500:
+        PROVIDER_FAILURES.labels(provider, endpoint).inc()
+        for cb in (endpoint_cb, provider_cb):
+            cb.record_failure(latency, f"HTTP {r.status_code}")
+    else:
+        for cb in (endpoint_cb, provider_cb):
+            cb.record_success(latency)
+    if not 200 <= r.status_code < 300:
+        raise ProviderHTTPError(provider, endpoint, r.status_code)
+    return r
+
 def fetch_instagram_metrics(acc: SocialAccount, db=None):
     """Fetch simple IG metrics and store a snapshot. acc.account_id should be IG user ID."""
     token = acc.access_token
@@ -14,12 +70,14 @@ def fetch_instagram_metrics(acc: SocialAccount, db=None):
         return
 
     # Try to obtain followers via the IG user node or via connected page
-    base = f"https://graph.facebook.com/v16.0/{acc.account_id}"
+    base = f"{GRAPH_API_BASE}/{acc.account_id}"
     params = {"fields": "followers_count", "access_token": token}
     # Some IG endpoints differ; attempt a few
     try:
-        r = requests.get(base, params=params, timeout=15)
+        r = provider_get("graph", "ig_profile", base, params=params, timeout=15)
         data = r.json()
+    except (CircuitOpenError, ProviderHTTPError):
+        raise
     except Exception as e:
         logger.error("IG request error: %s", e)
         return
@@ -31,9 +89,10 @@ def fetch_instagram_metrics(acc: SocialAccount, db=None):
     except Exception:
         followers = None
 
-    # For impressions/reach, call insights endpoint if available (example)
+    # For impressions/reach, call insights endpoint if available (example).
+    # An open insights breaker only drops impressions; the profile snapshot is still stored.
     try:
-        insights_res = requests.get(f"{base}/insights", params={"metric": "impressions,reach,engagement", "access_token": token}, timeout=15)
+        insights_res = provider_get("graph", "ig_insights", f"{base}/insights", params={"metric": "impressions,reach,engagement", "access_token": token}, timeout=15)
         insights = insights_res.json()
         impressions = None
         # Parse insights array if present
@@ -58,6 +117,7 @@ def fetch_instagram_metrics(acc: SocialAccount, db=None):
         )
         local_db.add(snap)
         local_db.commit()
+        return snap
     finally:
         if db is None:
             local_db.close()
@@ -70,9 +130,11 @@ def fetch_youtube_metrics(acc: SocialAccount, db=None):
 
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        r = requests.get(f"https://www.googleapis.com/youtube/v3/channels?part=statistics&id={acc.account_id}", headers=headers, timeout=15)
+        r = provider_get("youtube", "channels", f"{YOUTUBE_API_BASE}/channels?part=statistics&id={acc.account_id}", headers=headers, timeout=15)
         data = r.json()
         stats = data.get("items", [])[0].get("statistics", {}) if data.get("items") else {}
+    except (CircuitOpenError, ProviderHTTPError):
+        raise
     except Exception as e:
         logger.error("YT fetch error: %s", e)
         return
@@ -92,6 +154,7 @@ def fetch_youtube_metrics(acc: SocialAccount, db=None):
         )
         local_db.add(snap)
         local_db.commit()
+        return snap
     finally:
         if db is None:
             local_db.close()
@@ -103,8 +166,10 @@ def fetch_facebook_metrics(acc: SocialAccount, db=None):
         return
 
     try:
-        r = requests.get(f"https://graph.facebook.com/v16.0/{acc.account_id}/insights", params={"metric":"page_impressions,page_engaged_users", "access_token": token}, timeout=15)
+        r = provider_get("graph", "page_insights", f"{GRAPH_API_BASE}/{acc.account_id}/insights", params={"metric":"page_impressions,page_engaged_users", "access_token": token}, timeout=15)
         data = r.json()
+    except (CircuitOpenError, ProviderHTTPError):
+        raise
     except Exception as e:
         logger.error("FB fetch error: %s", e)
         return
@@ -130,23 +195,57 @@ def fetch_facebook_metrics(acc: SocialAccount, db=None):
         )
         local_db.add(snap)
         local_db.commit()
+        return snap
     finally:
         if db is None:
             local_db.close()
 
+FETCHERS = {
+    "instagram": fetch_instagram_metrics,
+    "youtube": fetch_youtube_metrics,
+    "facebook": fetch_facebook_metrics,
+}
+
+def fetch_account(acc: SocialAccount, db=None):
+    """Fetch and store a snapshot for a single account using its platform's fetcher.
+    Returns the stored snapshot, or None if the fetch failed.
+    Raises CircuitOpenError when the provider's breaker is open and the fetch was skipped."""
+    fetcher = FETCHERS.get(acc.platform)
+    if fetcher is None:
+        logger.warning("No fetcher for platform %s (account %s)", acc.platform, acc.account_id)
+        return
+    start = time.perf_counter()
+    snap = None
+    outcome = "error"
+    try:
+        snap = fetcher(acc, db)
+        outcome = "ok" if snap is not None else "error"
+        return snap
+    except ProviderHTTPError as e:
+        outcome = "rate_limited" if e.status_code == 429 else "error"
+        logger.warning("Fetch for %s:%s failed, no snapshot stored: %s", acc.platform, acc.account_id, e)
+        return None
+    except CircuitOpenError:
+        outcome = "skipped"
+        raise
+    finally:
+        if outcome != "skipped":
+            FETCH_SECONDS.labels(acc.platform).observe(time.perf_counter() - start)
+        FETCH_TOTAL.labels(acc.platform, outcome).inc()
+
 def fetch_all_analytics():
     db = SessionLocal()
     try:
         accounts = db.query(SocialAccount).all()
+        skipped = 0
         for acc in accounts:
             try:
-                if acc.platform == "instagram":
-                    fetch_instagram_metrics(acc, db)
-                elif acc.platform == "youtube":
-                    fetch_youtube_metrics(acc, db)
-                elif acc.platform == "facebook":
-                    fetch_facebook_metrics(acc, db)
+                fetch_account(acc, db)
+            except CircuitOpenError:
+                skipped += 1
             except Exception as e:
                 logger.exception("Failed to fetch for %s:%s -> %s", acc.platform, acc.account_id, e)
+        if skipped:
+            logger.warning("Skipped %d account(s) behind open provider circuits", skipped)
     finally:
         db.close()
@@ -0,0 +1,73 @@
+# backend_source/app/services/analytics_series.py
+from datetime import datetime, date
+from typing import Dict, List, Optional
+from sqlalchemy import select, func, case
+from app.db.models_auth import AnalyticsSnapshot, engine
+
+METRICS = ["followers", "views", "likes", "comments", "impressions", "reach", "watch_time"]
+BUCKETS = ("hour", "day", "week")
+# Bucket keys are returned in the same string form on every dialect
+BUCKET_FORMATS = {"hour": "%Y-%m-%dT%H:00:00", "day": "%Y-%m-%d", "week": "%Y-%m-%d"}
+
+
+def bucket_expr(bucket: str):
+    """SQL expression truncating the snapshot timestamp to the start of its bucket."""
+    ts = AnalyticsSnapshot.timestamp
+    if engine.dialect.name == "sqlite":
+        if bucket in ("hour", "day"):
+            return func.strftime(BUCKET_FORMATS[bucket], ts)
+        # Monday-start week: jump to the coming Sunday, then back six days
+        return func.date(ts, "weekday 0", "-6 days")
+    return func.date_trunc(bucket, ts)
+
+
+def _bucket_key(value, bucket: str) -> str:
+    # date_trunc returns a timestamp; SQLite already yields the formatted string
+    return value.strftime(BUCKET_FORMATS[bucket]) if isinstance(value, (datetime, date)) else value
+
+
+def bucketed_series(db, platform: str, accounts: Optional[List[str]], since: datetime,
+                    bucket: str = "day") -> Dict[str, List[dict]]:
+    """Aggregate snapshots per account and time bucket inside the database.
+
+    For every metric returns last (latest value in the bucket), avg and delta
+    (this bucket's last minus the previous bucket's last; None for an account's first
+    bucket in the range). Only one row per account+bucket leaves the DB.
+    """
+    b = bucket_expr(bucket).label("bucket")
+    part = [AnalyticsSnapshot.account_id, b]
+    filters = [AnalyticsSnapshot.platform == platform, AnalyticsSnapshot.timestamp >= since]
+    if accounts:
+        filters.append(AnalyticsSnapshot.account_id.in_(accounts))
+    inner = select(
+        AnalyticsSnapshot.account_id,
+        b,
+        *[getattr(AnalyticsSnapshot, m) for m in METRICS],
+        func.row_number().over(partition_by=part, order_by=AnalyticsSnapshot.timestamp.desc()).label("rn_last"),
+    ).where(*filters).subquery()
+
+    cols = [inner.c.account_id, inner.c.bucket, func.count().label("samples")]
+    for m in METRICS:
+        c = inner.c[m]
+        cols += [func.max(case((inner.c.rn_last == 1, c))).label(f"{m}_last"), func.avg(c).label(f"{m}_avg")]
+    grouped = select(*cols).group_by(inner.c.account_id, inner.c.bucket).subquery()
+
+    # delta across buckets: LAG over each account's buckets in time order
+    prev = dict(partition_by=grouped.c.account_id, order_by=grouped.c.bucket)
+    q = select(
+        grouped,
+        *[(grouped.c[f"{m}_last"] - func.lag(grouped.c[f"{m}_last"]).over(**prev)).label(f"{m}_delta") for m in METRICS],
+    ).order_by(grouped.c.account_id, grouped.c.bucket)
+
+    series: Dict[str, List[dict]] = {}
+    for row in db.execute(q).mappings():
+        point = {"bucket": _bucket_key(row["bucket"], bucket), "samples": row["samples"]}
+        for m in METRICS:
+            avg = row[f"{m}_avg"]
+            point[m] = {
+                "last": row[f"{m}_last"],
+                "avg": round(float(avg), 2) if avg is not None else None,
+                "delta": row[f"{m}_delta"],
+            }
+        series.setdefault(row["account_id"], []).append(point)
+    return series
@@ -1,42 +1,72 @@
 # backend_source/app/services/background_jobs.py
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
-from app.db.models import SessionLocal, ScheduledPost
-from app.services.analytics_fetchers import fetch_all_analytics
+from datetime import datetime, timezone
+from app.services.fetch_scheduler import dispatch_due_fetches
+from app.services.retention import run_retention
+from app.services.publishing import publishing_pool
+from app.services.hashtag_index import ensure_loaded as load_hashtag_index, refresh_hashtag_index
+from app.services.metrics import timed_job
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("VidReacherScheduler")
 
+_scheduler = None
+
+@timed_job("process_scheduled_posts")
 def process_scheduled_posts():
-    """Check DB for due posts and mark them as posted."""
-    db = SessionLocal()
+    """Hand due posts to the publishing pool (rate limited, retried, dead-lettered on repeated failure)."""
     try:
-        now = datetime.utcnow()
-        due_posts = db.query(ScheduledPost).filter(
-            ScheduledPost.status == "pending",
-            ScheduledPost.scheduled_time <= now
-        ).all()
-
-        for post in due_posts:
-            post.status = "posted"
-            db.commit()
-            logger.info(f"[✅ POSTED] {post.platform.upper()} - {post.caption[:50]}... at {now}")
+        n = publishing_pool.dispatch_due()
+        if n:
+            logger.info(f"Dispatched {n} scheduled post(s) for publishing")
     except Exception as e:
         logger.error(f"Error processing scheduled posts: {e}")
-    finally:
-        db.close()
+        raise  # let timed_job count the failure; APScheduler logs it and keeps the job scheduled
+
+def notify_posts_scheduled(earliest: datetime):
+    """Bring the post dispatcher's next run forward to `earliest` (naive UTC) when posts become
+    due before its next 60-second tick: newly stored posts, and posts deferred by rate limits
+    or retry backoff."""
+    if _scheduler is None:
+        return
+    try:
+        job = _scheduler.get_job("post_checker")
+        if job is None:
+            return
+        when = max(earliest, datetime.utcnow()).replace(tzinfo=timezone.utc)
+        if job.next_run_time is not None and job.next_run_time <= when:
+            return
+        _scheduler.modify_job("post_checker", next_run_time=when)
+    except Exception as e:
+        logger.warning(f"Could not wake post dispatcher: {e}")
 
 def start_scheduler():
     """Starts the background scheduler that runs every 60 seconds."""
-    scheduler = BackgroundScheduler()
+    global _scheduler
+    scheduler = _scheduler = BackgroundScheduler()
+    publishing_pool.recover_stale_claims()
+    publishing_pool.on_requeued(notify_posts_scheduled)
     scheduler.add_job(process_scheduled_posts, "interval", seconds=60, id="post_checker")
     scheduler.start()
     logger.info("✅ Background Scheduler started (checks every 60 seconds)")
     try:
-        scheduler.add_job(fetch_all_analytics, 'cron', hour=2, minute=0, id='daily_analytics')
-        logger.info("✅ Daily analytics job scheduled at 02:00 UTC")
+        # per-account fetches are spread across the day by the fetch scheduler's due-time queue
+        scheduler.add_job(dispatch_due_fetches, 'interval', seconds=60, id='analytics_fetcher')
+        logger.info("✅ Analytics fetch dispatcher scheduled (checks every 60 seconds)")
     except Exception:
         # job may already exist if reloading; that's okay
-        logger.info("Daily analytics job registration skipped (maybe already exists)")
+        logger.info("Analytics fetch job registration skipped (maybe already exists)")
+    try:
+        scheduler.add_job(run_retention, 'cron', hour=3, minute=30, id='analytics_retention')
+        logger.info("✅ Analytics retention job scheduled at 03:30 UTC")
+    except Exception:
+        logger.info("Analytics retention job registration skipped (maybe already exists)")
+    try:
+        load_hashtag_index()
+        # first run right away catches up on posts published since the index was saved
+        scheduler.add_job(refresh_hashtag_index, 'interval', hours=1, id='hashtag_index', next_run_time=datetime.now())
+        logger.info("✅ Hashtag index refresh scheduled (hourly)")
+    except Exception:
+        logger.info("Hashtag index job registration skipped (maybe already exists)")
     
@@ -0,0 +1,213 @@
+# backend_source/app/services/circuit_breaker.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from app.services.metrics import CIRCUIT_STATE, CIRCUIT_REJECTED
+
+logger = logging.getLogger("CircuitBreaker")
+
+# Consecutive failures that open a breaker
+FAILURE_THRESHOLD = int(os.getenv("CB_FAILURE_THRESHOLD", "5"))
+# A call slower than this counts as slow; the breaker opens when SLOW_CALL_RATE of the window is slow
+SLOW_CALL_SECONDS = float(os.getenv("CB_SLOW_CALL_SECONDS", "5"))
+SLOW_CALL_RATE = float(os.getenv("CB_SLOW_CALL_RATE", "0.5"))
+WINDOW_SIZE = int(os.getenv("CB_WINDOW_SIZE", "20"))
+MIN_CALLS = int(os.getenv("CB_MIN_CALLS", "5"))
+# Open period before probing; doubled after every failed probe up to the max
+OPEN_SECONDS = float(os.getenv("CB_OPEN_SECONDS", "60"))
+MAX_OPEN_SECONDS = float(os.getenv("CB_MAX_OPEN_SECONDS", "900"))
+# Concurrent probe calls let through while half-open, and successes needed to close
+HALF_OPEN_PROBES = int(os.getenv("CB_HALF_OPEN_PROBES", "2"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name: str, retry_at: float):
+        super().__init__(f"circuit {name} is open until {retry_at:.0f}")
+        self.name = name
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    """Closed -> open on consecutive failures or a run of slow calls; open -> half-open after a cool-down;
+    half-open lets HALF_OPEN_PROBES calls through and closes once they all succeed."""
+
+    def __init__(self, provider: str, endpoint: str = "*"):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.name = f"{provider}:{endpoint}"
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.retry_at: Optional[float] = None
+        self.open_seconds = OPEN_SECONDS
+        self.last_error: Optional[str] = None
+        self._window = deque(maxlen=WINDOW_SIZE)   # (latency, ok)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._listeners: List[Callable[["CircuitBreaker", str, str], None]] = []
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(provider, endpoint).set(0)
+
+    def add_listener(self, fn: Callable[["CircuitBreaker", str, str], None]):
+        """fn(breaker, old_state, new_state) is called after every transition."""
+        self._listeners.append(fn)
+
+    # ---- transitions (caller holds the lock) ----
+    def _transition(self, new_state: str, now: float) -> Tuple[str, str]:
+        old = self.state
+        self.state = new_state
+        if new_state == OPEN:
+            self.opened_at = now
+            self.retry_at = now + self.open_seconds
+        elif new_state == CLOSED:
+            self.open_seconds = OPEN_SECONDS
+            self.opened_at = self.retry_at = None
+            self.consecutive_failures = 0
+            self._window.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        CIRCUIT_STATE.labels(self.provider, self.endpoint).set(_STATE_VALUES[new_state])
+        return old, new_state
+
+    def _notify(self, change: Optional[Tuple[str, str]]):
+        if change is None:
+            return
+        old, new = change
+        log = logger.warning if new == OPEN else logger.info
+        log("Circuit %s %s -> %s%s", self.name, old, new,
+            f" (retry in {self.open_seconds:.0f}s, last error: {self.last_error})" if new == OPEN else "")
+        for fn in list(self._listeners):
+            try:
+                fn(self, old, new)
+            except Exception:
+                logger.exception("Circuit listener failed for %s", self.name)
+
+    # ---- call protocol ----
+    def allow(self):
+        """Reserve a call. Raises CircuitOpenError when the call must be skipped."""
+        change = None
+        with self._lock:
+            now = time.time()
+            if self.state == OPEN and now >= self.retry_at:
+                change = self._transition(HALF_OPEN, now)
+            if self.state == OPEN:
+                retry_at = self.retry_at
+            elif self.state == HALF_OPEN and self._probes_in_flight >= HALF_OPEN_PROBES:
+                # probes are out; the rest wait for them to settle (a close re-queues them right away)
+                retry_at = now + self.open_seconds
+            else:
+                if self.state == HALF_OPEN:
+                    self._probes_in_flight += 1
+                retry_at = None
+        self._notify(change)
+        if retry_at is not None:
+            CIRCUIT_REJECTED.labels(self.provider, self.endpoint).inc()
+            raise CircuitOpenError(self.name, retry_at)
+
+    def release(self):
+        """Give back a reservation from allow() without an outcome (the call was never made)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record_success(self, latency: float):
+        change = None
+        with self._lock:
+            now = time.time()
+            slow = latency >= SLOW_CALL_SECONDS
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self.last_error = f"slow probe ({latency:.1f}s)"
+                    self.open_seconds = min(self.open_seconds * 2, MAX_OPEN_SECONDS)
+                    change = self._transition(OPEN, now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= HALF_OPEN_PROBES:
+                        change = self._transition(CLOSED, now)
+            elif self.state == CLOSED:
+                self.consecutive_failures = 0
+                self._window.append((latency, True))
+                if self._too_slow():
+                    self.last_error = f"slow calls (>= {SLOW_CALL_SECONDS:g}s)"
+                    change = self._transition(OPEN, now)
+        self._notify(change)
+
+    def record_failure(self, latency: float, error: str = ""):
+        change = None
+        with self._lock:
+            now = time.time()
+            self.last_error = error or self.last_error
+            if self.state == HALF_OPEN:
+                self.open_seconds = min(self.open_seconds * 2, MAX_OPEN_SECONDS)
+                change = self._transition(OPEN, now)
+            elif self.state == CLOSED:
+                self.consecutive_failures += 1
+                self._window.append((latency, False))
+                if self.consecutive_failures >= FAILURE_THRESHOLD or self._too_slow():
+                    change = self._transition(OPEN, now)
+        self._notify(change)
+
+    def _too_slow(self) -> bool:
+        if len(self._window) < MIN_CALLS:
+            return False
+        slow = sum(1 for latency, _ in self._window if latency >= SLOW_CALL_SECONDS)
+        return slow / len(self._window) >= SLOW_CALL_RATE
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            window = list(self._window)
+            latencies = sorted(l for l, _ in window)
+            return {
+                "provider": self.provider,
+                "endpoint": self.endpoint,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "recent_calls": len(window),
+                "recent_failure_rate": round(sum(1 for _, ok in window if not ok) / len(window), 3) if window else None,
+                "recent_p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "opened_at": self.opened_at,
+                "retry_at": self.retry_at,
+                "last_error": self.last_error,
+            }
+
+
+# ---- registry ----
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+_global_listeners: List[Callable[[CircuitBreaker, str, str], None]] = []
+
+
+def get_breaker(provider: str, endpoint: str = "*") -> CircuitBreaker:
+    """Breaker for a provider ("*" = provider-wide) or one of its endpoints, created on first use."""
+    key = (provider, endpoint)
+    with _registry_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(provider, endpoint)
+            for fn in _global_listeners:
+                breaker.add_listener(fn)
+        return breaker
+
+
+def add_listener(fn: Callable[[CircuitBreaker, str, str], None]):
+    """Subscribe to transitions of every breaker, including ones created later."""
+    with _registry_lock:
+        _global_listeners.append(fn)
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.add_listener(fn)
+
+
+def breaker_states() -> List[dict]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in sorted(breakers, key=lambda b: b.name)]
@@ -0,0 +1,272 @@
+# backend_source/app/services/fetch_scheduler.py
+import os
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from app.db.models_auth import SessionLocal, SocialAccount, AnalyticsSnapshot
+from app.services.analytics_fetchers import fetch_account
+from app.services.circuit_breaker import CircuitOpenError, CLOSED, add_listener
+from app.services.metrics import timed_job, SCHEDULER_LAG_SECONDS
+
+logger = logging.getLogger("FetchScheduler")
+
+# Refresh interval (seconds) per activity tier
+TIER_INTERVALS = {
+    "hot": 3600,            # fast-moving accounts: hourly
+    "normal": 86400,        # daily
+    "dormant": 7 * 86400,   # no movement at all: weekly
+}
+# Relative follower/view growth per day above which an account counts as "hot"
+HOT_GROWTH_PER_DAY = float(os.getenv("FETCH_HOT_GROWTH_PER_DAY", "0.01"))
+ACTIVITY_WINDOW_DAYS = int(os.getenv("FETCH_ACTIVITY_WINDOW_DAYS", "7"))
+# +/- fraction of the interval added as random jitter so accounts don't re-align
+JITTER_FRACTION = float(os.getenv("FETCH_JITTER_FRACTION", "0.1"))
+# Overdue / never-fetched accounts are spread over this many seconds instead of firing at once
+CATCHUP_SPREAD = int(os.getenv("FETCH_CATCHUP_SPREAD", "3600"))
+
+# Classification looks back far enough to always include the previous fetch, even after a
+# weekly interval stretched by jitter; otherwise dormant accounts flip back to "normal"
+CLASSIFY_WINDOW = max(ACTIVITY_WINDOW_DAYS * 86400, TIER_INTERVALS["dormant"] * (1 + JITTER_FRACTION) + 86400)
+
+# Provider requests allowed per rolling hour, per platform
+PLATFORM_BUDGETS = {
+    "instagram": int(os.getenv("FETCH_BUDGET_INSTAGRAM", "180")),
+    "facebook": int(os.getenv("FETCH_BUDGET_FACEBOOK", "180")),
+    "youtube": int(os.getenv("FETCH_BUDGET_YOUTUBE", "400")),
+}
+# Provider requests issued by one fetch (instagram hits profile + insights)
+REQUESTS_PER_FETCH = {"instagram": 2, "facebook": 1, "youtube": 1}
+BUDGET_WINDOW = 3600
+# Accounts skipped behind an open circuit are re-queued over this many seconds once it closes
+RECOVERY_SPREAD = int(os.getenv("FETCH_RECOVERY_SPREAD", "60"))
+
+
+def _epoch(ts: datetime) -> float:
+    # snapshot timestamps are naive UTC
+    return ts.replace(tzinfo=timezone.utc).timestamp()
+
+
+class FetchScheduler:
+    """Per-account fetch queue ordered by next-due time.
+
+    Each account is re-fetched on an interval chosen from its recent activity,
+    with jitter, while a rolling per-platform request budget caps provider traffic.
+    """
+
+    def __init__(self):
+        self._heap = []                   # (due, seq, social_account_id)
+        self._entries: Dict[int, dict] = {}  # social_account_id -> {"due", "platform", "tier"}
+        self._sent: Dict[str, deque] = {}    # platform -> deque of (sent_at, cost)
+        self._deferred: Dict[int, str] = {}  # social_account_id -> name of the breaker that skipped it
+        self._recovered = deque()            # breaker names closed since the last dispatch
+        self._seq = 0
+        self._lock = threading.Lock()
+        add_listener(self._on_circuit_change)
+
+    # ---- activity ----
+    def classify(self, db, platform: str, account_id: str) -> str:
+        """Pick an activity tier from the first/last snapshot of the recent window.
+
+        No change at all across the window's snapshots means dormant, however short the span;
+        snapshots without a single comparable metric leave the account at normal.
+        """
+        cutoff = datetime.utcfromtimestamp(time.time() - CLASSIFY_WINDOW)
+        q = db.query(AnalyticsSnapshot).filter(
+            AnalyticsSnapshot.platform == platform,
+            AnalyticsSnapshot.account_id == account_id,
+            AnalyticsSnapshot.timestamp >= cutoff,
+        )
+        first = q.order_by(AnalyticsSnapshot.timestamp).first()
+        last = q.order_by(AnalyticsSnapshot.timestamp.desc()).first()
+        if not first or not last or first.id == last.id:
+            return "normal"
+        days = (last.timestamp - first.timestamp).total_seconds() / 86400
+        if days <= 0:
+            return "normal"
+        growth = 0.0
+        changed = compared = False
+        for field in ("followers", "views", "impressions"):
+            a, b = getattr(first, field), getattr(last, field)
+            if a is None or b is None:
+                continue
+            compared = True
+            if a != b:
+                changed = True
+            if a:
+                growth = max(growth, abs(b - a) / a / days)
+        if growth >= HOT_GROWTH_PER_DAY:
+            return "hot"
+        if compared and not changed:
+            return "dormant"
+        # nothing comparable (failed fetch, unparsed insights) says nothing about activity
+        return "normal"
+
+    def _last_fetch(self, db, platform: str, account_id: str) -> Optional[float]:
+        row = db.query(AnalyticsSnapshot.timestamp).filter(
+            AnalyticsSnapshot.platform == platform,
+            AnalyticsSnapshot.account_id == account_id,
+        ).order_by(AnalyticsSnapshot.timestamp.desc()).first()
+        return _epoch(row[0]) if row else None
+
+    # ---- queue ----
+    def _push(self, sa_id: int, platform: str, tier: str, due: float):
+        self._seq += 1
+        self._entries[sa_id] = {"due": due, "platform": platform, "tier": tier}
+        heapq.heappush(self._heap, (due, self._seq, sa_id))
+
+    def _next_due(self, tier: str, base: float) -> float:
+        interval = TIER_INTERVALS[tier]
+        return base + interval * (1 + random.uniform(-JITTER_FRACTION, JITTER_FRACTION))
+
+    def sync(self, db):
+        """Add newly connected accounts to the queue and drop disconnected ones."""
+        rows = db.query(SocialAccount.id, SocialAccount.platform, SocialAccount.account_id).all()
+        now = time.time()
+        live = set()
+        for sa_id, platform, account_id in rows:
+            live.add(sa_id)
+            if sa_id in self._entries:
+                continue
+            tier = self.classify(db, platform, account_id)
+            last = self._last_fetch(db, platform, account_id)
+            due = self._next_due(tier, last) if last else now
+            if due <= now:
+                # overdue or never fetched: spread the backlog rather than bursting
+                due = now + random.uniform(0, min(CATCHUP_SPREAD, TIER_INTERVALS[tier]))
+            self._push(sa_id, platform, tier, due)
+        for sa_id in list(self._entries):
+            if sa_id not in live:
+                del self._entries[sa_id]   # its heap item becomes stale and is skipped
+
+    # ---- budgets ----
+    def _take_budget(self, platform: str, now: float) -> Optional[float]:
+        """Reserve budget for one fetch. Returns None if granted, else the time it frees up."""
+        budget = PLATFORM_BUDGETS.get(platform)
+        if budget is None:
+            return None
+        cost = REQUESTS_PER_FETCH.get(platform, 1)
+        sent = self._sent.setdefault(platform, deque())
+        while sent and sent[0][0] <= now - BUDGET_WINDOW:
+            sent.popleft()
+        used = sum(c for _, c in sent)
+        if used + cost > budget:
+            return sent[0][0] + BUDGET_WINDOW if sent else now + BUDGET_WINDOW
+        sent.append((now, cost))
+        return None
+
+    def _refund_budget(self, platform: str):
+        sent = self._sent.get(platform)
+        if sent:
+            sent.pop()
+
+    # ---- circuit breakers ----
+    def _on_circuit_change(self, breaker, old: str, new: str):
+        # may run on any thread; the queue itself is only touched from run_due
+        if new == CLOSED:
+            self._recovered.append(breaker.name)
+
+    def _requeue_recovered(self, now: float):
+        """Pull accounts skipped behind a breaker that has since closed back to (about) now."""
+        names = set()
+        while self._recovered:
+            names.add(self._recovered.popleft())
+        if not names:
+            return
+        requeued = 0
+        for sa_id, name in list(self._deferred.items()):
+            if name not in names:
+                continue
+            del self._deferred[sa_id]
+            entry = self._entries.get(sa_id)
+            if entry is not None:
+                self._push(sa_id, entry["platform"], entry["tier"], now + random.uniform(0, RECOVERY_SPREAD))
+                requeued += 1
+        if requeued:
+            logger.info("Re-queued %d account(s) after %s recovered", requeued, ", ".join(sorted(names)))
+
+    # ---- dispatch ----
+    def run_due(self):
+        """Fetch every account whose next-due time has passed, within platform budgets."""
+        if not self._lock.acquire(blocking=False):
+            logger.info("Fetch dispatch already running, skipping tick")
+            return
+        db = SessionLocal()
+        try:
+            self.sync(db)
+            now = time.time()
+            fetched = skipped = 0
+            self._requeue_recovered(now)
+            while self._heap and self._heap[0][0] <= now:
+                # a breaker may close mid-tick, after a successful probe
+                self._requeue_recovered(now)
+                due, _, sa_id = heapq.heappop(self._heap)
+                entry = self._entries.get(sa_id)
+                if entry is None or entry["due"] != due:
+                    continue  # stale heap item
+                retry_at = self._take_budget(entry["platform"], time.time())
+                if retry_at is not None:
+                    self._push(sa_id, entry["platform"], entry["tier"], retry_at + random.uniform(0, 60))
+                    continue
+                acc = db.query(SocialAccount).filter(SocialAccount.id == sa_id).first()
+                if acc is None:
+                    del self._entries[sa_id]
+                    continue
+                SCHEDULER_LAG_SECONDS.labels("fetches").observe(max(0.0, time.time() - due))
+                self._deferred.pop(sa_id, None)
+                try:
+                    fetch_account(acc, db)
+                    fetched += 1
+                except CircuitOpenError as e:
+                    # provider is down: no request was made, so give the budget back and wait for the breaker
+                    self._refund_budget(acc.platform)
+                    self._deferred[sa_id] = e.name
+                    self._push(sa_id, acc.platform, entry["tier"], e.retry_at + random.uniform(0, RECOVERY_SPREAD))
+                    skipped += 1
+                    continue
+                except Exception as e:
+                    db.rollback()
+                    logger.exception("Failed to fetch for %s:%s -> %s", acc.platform, acc.account_id, e)
+                tier = self.classify(db, acc.platform, acc.account_id)
+                self._push(sa_id, acc.platform, tier, self._next_due(tier, time.time()))
+            if fetched:
+                logger.info("Fetched analytics for %d account(s)", fetched)
+            if skipped:
+                logger.warning("Deferred %d account(s) behind open provider circuits", skipped)
+        finally:
+            db.close()
+            self._lock.release()
+
+    def force_due(self, db) -> int:
+        """Make every connected account due now (manual refresh, benchmarks). Returns how many."""
+        with self._lock:
+            self.sync(db)
+            now = time.time()
+            for sa_id, entry in list(self._entries.items()):
+                self._push(sa_id, entry["platform"], entry["tier"], now)
+            return len(self._entries)
+
+    def status(self) -> Dict[str, int]:
+        """Number of queued accounts per tier."""
+        counts = {tier: 0 for tier in TIER_INTERVALS}
+        for entry in list(self._entries.values()):
+            counts[entry["tier"]] = counts.get(entry["tier"], 0) + 1
+        return counts
+
+    def deferred(self) -> Dict[str, int]:
+        """Number of accounts waiting on each open breaker."""
+        counts: Dict[str, int] = {}
+        for name in list(self._deferred.values()):
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+fetch_scheduler = FetchScheduler()
+
+@timed_job("dispatch_due_fetches")
+def dispatch_due_fetches():
+    fetch_scheduler.run_due()
@@ -0,0 +1,283 @@
+# backend_source/app/services/hashtag_index.py
+import os
+import re
+import gzip
+import json
+import math
+import time
+import heapq
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from app.db.models import SessionLocal as PostSessionLocal, ScheduledPost
+from app.db.models_auth import SessionLocal as AnalyticsSessionLocal, AnalyticsSnapshot
+from app.services.metrics import timed_job
+
+logger = logging.getLogger("HashtagIndex")
+
+INDEX_PATH = os.getenv("HASHTAG_INDEX_PATH", "./data/hashtag_index.json.gz")
+# Engagement weight halves every HALF_LIFE_DAYS, so recent winners outrank old ones
+HALF_LIFE_DAYS = float(os.getenv("HASHTAG_HALF_LIFE_DAYS", "14"))
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)
+# A post is indexed once this much time has passed since publishing, so its engagement is known
+ENGAGEMENT_WINDOW = timedelta(hours=int(os.getenv("HASHTAG_ENGAGEMENT_HOURS", "48")))
+# Per-metric weight of the account's growth over the engagement window
+ENGAGEMENT_WEIGHTS = {"likes": 1.0, "comments": 2.0, "views": 0.05, "impressions": 0.01}
+MAX_TAGS_PER_KEYWORD = int(os.getenv("HASHTAG_MAX_TAGS_PER_KEYWORD", "50"))
+BATCH_SIZE = 500
+# Rebase stored scores before exp() grows past this exponent
+MAX_EXPONENT = 50.0
+FORMAT_VERSION = 1
+
+_TAG_RE = re.compile(r"#(\w+)")
+_WORD_RE = re.compile(r"[a-z0-9']{3,}")
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "are", "our", "you", "your", "was", "were",
+    "has", "have", "had", "but", "not", "all", "can", "will", "just", "its", "into", "out", "about",
+    "how", "what", "when", "who", "why", "new", "more", "now", "get", "got", "one",
+}
+
+
+def caption_tags(caption: str) -> List[str]:
+    return _TAG_RE.findall(caption or "")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase non-stopword tokens of a text, repeats included; hashtag bodies count as words.
+
+    Shared by the index and the caption helpers so suggestions are looked up with the same keys they were built from.
+    """
+    text = (text or "").lower().replace("#", " ")
+    words = (w.strip("'") for w in _WORD_RE.findall(text))
+    return [w for w in words if len(w) >= 3 and w not in _STOPWORDS]
+
+
+def keywords(text: str) -> List[str]:
+    """Distinct keywords of a text, in order of appearance."""
+    return list(dict.fromkeys(tokenize(text)))
+
+
+class HashtagIndex:
+    """Inverted index keyword -> {tag: decayed engagement score} built from published captions.
+
+    Scores are stored pre-scaled by exp(DECAY_RATE * (t - t0)) at the post's publish time t,
+    so adding a post never touches older entries and ranking needs no per-query decay.
+    """
+
+    def __init__(self):
+        self.t0 = time.time()
+        self.tag_scores: Dict[str, float] = {}               # tag -> global score
+        self.keyword_tags: Dict[str, Dict[str, float]] = {}  # keyword -> {tag: score}
+        self.display: Dict[str, str] = {}                    # tag -> casing as last written
+        self.watermark: Tuple[Optional[str], int] = (None, 0)  # (posted_at iso, id) of the last indexed post
+        self.posts_indexed = 0
+        self._lock = threading.Lock()
+
+    # ---- scoring ----
+    def _scale(self, ts: float) -> float:
+        return math.exp(DECAY_RATE * (ts - self.t0))
+
+    def _rebase(self, ts: float):
+        """Shift t0 forward so exp() stays finite; every stored score shrinks by the same factor."""
+        factor = 1.0 / self._scale(ts)
+        self.t0 = ts
+        for tag in self.tag_scores:
+            self.tag_scores[tag] *= factor
+        for tags in self.keyword_tags.values():
+            for tag in tags:
+                tags[tag] *= factor
+
+    def add_post(self, caption: str, posted_at: datetime, engagement: float):
+        """Index one caption; the caller holds the lock."""
+        tags = caption_tags(caption)
+        if not tags:
+            return
+        ts = posted_at.timestamp() if posted_at.tzinfo else (posted_at - datetime(1970, 1, 1)).total_seconds()
+        if DECAY_RATE * (ts - self.t0) > MAX_EXPONENT:
+            self._rebase(ts)
+        weight = (1.0 + math.log1p(max(engagement, 0.0))) * self._scale(ts)
+        keys = {t.lower(): t for t in tags}
+        text_keywords = keywords(_TAG_RE.sub(" ", caption)) + list(keys)
+        for key, shown in keys.items():
+            self.display[key] = shown
+            self.tag_scores[key] = self.tag_scores.get(key, 0.0) + weight
+        for kw in set(text_keywords):
+            bucket = self.keyword_tags.setdefault(kw, {})
+            for key in keys:
+                bucket[key] = bucket.get(key, 0.0) + weight
+            if len(bucket) > 2 * MAX_TAGS_PER_KEYWORD:
+                keep = heapq.nlargest(MAX_TAGS_PER_KEYWORD, bucket.items(), key=lambda kv: kv[1])
+                self.keyword_tags[kw] = dict(keep)
+        self.posts_indexed += 1
+
+    # ---- queries ----
+    def suggest(self, text: str, max_tags: int = 8) -> List[str]:
+        """Tags co-occurring with the text's keywords, ranked by summed decayed engagement."""
+        kws = keywords(text)
+        with self._lock:
+            scores: Dict[str, float] = {}
+            n_tags = len(self.tag_scores) or 1
+            for kw in kws:
+                bucket = self.keyword_tags.get(kw)
+                if not bucket:
+                    continue
+                # generic words co-occur with everything; weight each keyword by how selective it is
+                idf = math.log(1 + n_tags / len(bucket))
+                for tag, s in bucket.items():
+                    scores[tag] = scores.get(tag, 0.0) + s * idf
+            # a tag spelled exactly like a keyword in the text is the strongest signal
+            for kw in kws:
+                if kw in scores:
+                    scores[kw] *= 2
+            best = heapq.nlargest(max_tags, scores.items(), key=lambda kv: kv[1])
+            return ["#" + self.display.get(tag, tag) for tag, _ in best]
+
+    def top_tags(self, n: int = 20) -> List[dict]:
+        """Highest-scoring tags overall, with scores decayed to now."""
+        with self._lock:
+            now_factor = 1.0 / self._scale(time.time())
+            best = heapq.nlargest(n, self.tag_scores.items(), key=lambda kv: kv[1])
+            return [{"tag": "#" + self.display.get(t, t), "score": round(s * now_factor, 4)} for t, s in best]
+
+    # ---- incremental build ----
+    def update(self, limit: Optional[int] = None) -> int:
+        """Index posts published since the watermark whose engagement window has closed."""
+        cutoff = datetime.utcnow() - ENGAGEMENT_WINDOW
+        added = 0
+        post_db = PostSessionLocal()
+        snap_db = AnalyticsSessionLocal()
+        try:
+            while limit is None or added < limit:
+                q = post_db.query(ScheduledPost.id, ScheduledPost.platform, ScheduledPost.account_id,
+                                  ScheduledPost.caption, ScheduledPost.posted_at).filter(
+                    ScheduledPost.status == "posted",
+                    ScheduledPost.posted_at.isnot(None),
+                    ScheduledPost.posted_at <= cutoff,
+                )
+                wm_ts, wm_id = self.watermark
+                if wm_ts is not None:
+                    wm = datetime.fromisoformat(wm_ts)
+                    q = q.filter(or_(ScheduledPost.posted_at > wm,
+                                     and_(ScheduledPost.posted_at == wm, ScheduledPost.id > wm_id)))
+                batch = q.order_by(ScheduledPost.posted_at, ScheduledPost.id).limit(BATCH_SIZE).all()
+                if not batch:
+                    break
+                engagement = _engagement(snap_db, batch)
+                with self._lock:
+                    for post in batch:
+                        self.add_post(post.caption or "", post.posted_at, engagement.get(post.id, 0.0))
+                    last = batch[-1]
+                    self.watermark = (last.posted_at.isoformat(), last.id)
+                added += len(batch)
+                if len(batch) < BATCH_SIZE:
+                    break
+        finally:
+            post_db.close()
+            snap_db.close()
+        return added
+
+    # ---- persistence ----
+    def save(self, path: str = INDEX_PATH):
+        with self._lock:
+            state = {
+                "version": FORMAT_VERSION,
+                "half_life_days": HALF_LIFE_DAYS,
+                "t0": self.t0,
+                "watermark": list(self.watermark),
+                "posts_indexed": self.posts_indexed,
+                "tags": self.tag_scores,
+                "display": self.display,
+                "keywords": self.keyword_tags,
+            }
+            body = json.dumps(state, separators=(",", ":")).encode()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wb", compresslevel=5) as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def load(self, path: str = INDEX_PATH) -> bool:
+        """Warm start from a saved index. A missing, unreadable or incompatible file leaves the index empty."""
+        try:
+            with gzip.open(path, "rb") as f:
+                state = json.loads(f.read())
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable hashtag index %s: %s", path, e)
+            return False
+        if state.get("version") != FORMAT_VERSION or state.get("half_life_days") != HALF_LIFE_DAYS:
+            logger.info("Hashtag index %s is from an incompatible build; rebuilding", path)
+            return False
+        with self._lock:
+            self.t0 = state["t0"]
+            self.watermark = tuple(state["watermark"])
+            self.posts_indexed = state["posts_indexed"]
+            self.tag_scores = state["tags"]
+            self.display = state["display"]
+            self.keyword_tags = state["keywords"]
+        return True
+
+
+def _engagement(db, posts) -> Dict[int, float]:
+    """Weighted growth of each post's account over the engagement window after it was published."""
+    by_account: Dict[Tuple[str, str], list] = {}
+    for p in posts:
+        if p.account_id:
+            by_account.setdefault((p.platform, p.account_id), []).append(p)
+    out: Dict[int, float] = {}
+    metrics = list(ENGAGEMENT_WEIGHTS)
+    for (platform, account_id), group in by_account.items():
+        start = min(p.posted_at for p in group) - timedelta(days=1)
+        end = max(p.posted_at for p in group) + ENGAGEMENT_WINDOW
+        rows = db.query(AnalyticsSnapshot.timestamp, *[getattr(AnalyticsSnapshot, m) for m in metrics]).filter(
+            AnalyticsSnapshot.platform == platform,
+            AnalyticsSnapshot.account_id == account_id,
+            AnalyticsSnapshot.timestamp >= start,
+            AnalyticsSnapshot.timestamp <= end,
+        ).order_by(AnalyticsSnapshot.timestamp).all()
+        if not rows:
+            continue
+        stamps = [r[0] for r in rows]
+        for p in group:
+            i = bisect.bisect_right(stamps, p.posted_at) - 1                  # last snapshot before posting
+            j = bisect.bisect_right(stamps, p.posted_at + ENGAGEMENT_WINDOW) - 1  # last one inside the window
+            if i < 0 or j <= i:
+                continue
+            score = 0.0
+            for k, m in enumerate(metrics, start=1):
+                before, after = rows[i][k], rows[j][k]
+                if before is not None and after is not None and after > before:
+                    score += (after - before) * ENGAGEMENT_WEIGHTS[m]
+            out[p.id] = score
+    return out
+
+
+hashtag_index = HashtagIndex()
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def ensure_loaded():
+    """Load the persisted index once per process (cheap no-op afterwards)."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            if hashtag_index.load():
+                logger.info("Loaded hashtag index: %d posts, %d tags", hashtag_index.posts_indexed, len(hashtag_index.tag_scores))
+            _loaded = True
+
+
+@timed_job("refresh_hashtag_index")
+def refresh_hashtag_index():
+    """Fold newly published posts into the index and persist it."""
+    ensure_loaded()
+    added = hashtag_index.update()
+    if added:
+        hashtag_index.save()
+        logger.info("Indexed %d new post(s) for hashtag suggestions", added)
@@ -0,0 +1,112 @@
+# backend_source/app/services/http_cache.py
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+from fastapi import Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
+
+# Dashboards poll every few seconds; 0 makes every poll a cheap revalidation (304) instead of a stale read
+CACHE_MAX_AGE = int(os.getenv("ANALYTICS_CACHE_MAX_AGE", "0"))
+# Bodies at least this large are brotli-compressed when the client accepts it (gzip is left to GZipMiddleware)
+BROTLI_MIN_SIZE = int(os.getenv("BROTLI_MIN_SIZE", "4096"))
+BROTLI_QUALITY = 5
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag from the validator parts (weak: the body may be served gzip/br/identity)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        tags = [t.strip() for t in inm.split(",")]
+        bare = etag[2:] if etag.startswith("W/") else etag
+        return "*" in tags or any((t[2:] if t.startswith("W/") else t) == bare for t in tags)
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def _utc(ts: datetime) -> datetime:
+    # snapshot timestamps are naive UTC
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def accepts_encoding(header: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding` (q > 0), honouring "*" and q-values."""
+    qvalues = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    q = qvalues.get(coding, qvalues.get("*", 0.0))
+    return q > 0
+
+
+def _brotli(body: bytes) -> Optional[bytes]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def conditional_json(request: Request, etag: str, last_modified: Optional[datetime], build: Callable[[], object]) -> Response:
+    """Answer 304 when the client's validators match; otherwise call build() and send the JSON body.
+
+    build() only runs on a miss, so an unchanged poll costs the validator lookup and nothing else.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode()
+    if len(body) >= BROTLI_MIN_SIZE and accepts_encoding(request.headers.get("accept-encoding", ""), "br"):
+        compressed = _brotli(body)
+        if compressed is not None:
+            body = compressed
+            headers["Content-Encoding"] = "br"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes requests matching skip(scope) straight through uncompressed."""
+
+    def __init__(self, app, skip: Callable[[dict], bool], **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.skip = skip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.skip(scope):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
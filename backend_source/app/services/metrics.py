@@ -0,0 +1,155 @@
+# backend_source/app/services/metrics.py
+import time
+import functools
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
+
+# ---- metric definitions ----
+HTTP_REQUEST_SECONDS = Histogram(
+    "vidreacher_http_request_duration_seconds",
+    "Latency of HTTP requests by route template",
+    ["method", "route", "status"],
+)
+JOB_SECONDS = Histogram(
+    "vidreacher_job_duration_seconds",
+    "Duration of background scheduler jobs",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900),
+)
+JOB_FAILURES = Counter(
+    "vidreacher_job_failures_total",
+    "Background scheduler jobs that raised",
+    ["job"],
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "vidreacher_scheduler_lag_seconds",
+    "Delay between an item's due time and its dispatch",
+    ["queue"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 4 * 3600, 86400),
+)
+FETCH_SECONDS = Histogram(
+    "vidreacher_fetch_duration_seconds",
+    "Duration of per-account analytics fetches",
+    ["platform"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60),
+)
+FETCH_TOTAL = Counter(
+    "vidreacher_fetch_total",
+    "Per-account analytics fetches by outcome (ok, error, rate_limited, skipped)",
+    ["platform", "outcome"],
+)
+PROVIDER_SECONDS = Histogram(
+    "vidreacher_provider_request_duration_seconds",
+    "Latency of outbound provider calls",
+    ["provider", "operation"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+PROVIDER_FAILURES = Counter(
+    "vidreacher_provider_failures_total",
+    "Outbound provider calls that failed",
+    ["provider", "operation"],
+)
+PUBLISH_SECONDS = Histogram(
+    "vidreacher_publish_duration_seconds",
+    "Duration of publisher calls",
+    ["platform"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PUBLISH_TOTAL = Counter(
+    "vidreacher_publish_total",
+    "Publish attempts by outcome (posted, retry, dead_letter, deferred)",
+    ["platform", "outcome"],
+)
+CIRCUIT_STATE = Gauge(
+    "vidreacher_circuit_breaker_state",
+    "Provider circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["provider", "endpoint"],
+)
+CIRCUIT_REJECTED = Counter(
+    "vidreacher_circuit_breaker_rejected_total",
+    "Provider calls skipped because their circuit breaker was open",
+    ["provider", "endpoint"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "vidreacher_db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+
+
+def render_latest():
+    """Return (body, content_type) in the Prometheus text exposition format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# ---- FastAPI routes ----
+class PrometheusMiddleware:
+    """Pure ASGI middleware timing each HTTP request, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router stores the matched route on the scope; use its template to bound cardinality
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status["code"])).observe(
+                time.perf_counter() - start
+            )
+
+
+# ---- SQLAlchemy ----
+def instrument_engine(engine):
+    """Time every cursor execution on the engine via SQLAlchemy engine events."""
+    if getattr(engine, "_vidreacher_instrumented", False):
+        return
+    engine._vidreacher_instrumented = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_SECONDS.labels(verb).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+# ---- background jobs ----
+def timed_job(name: str):
+    """Decorator recording duration and failures of a scheduler job."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                JOB_FAILURES.labels(name).inc()
+                raise
+            finally:
+                JOB_SECONDS.labels(name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,456 @@
+# backend_source/app/services/publishing.py
+import os
+import time
+import uuid
+import random
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import update, select, bindparam
+from app.db.models import SessionLocal, ScheduledPost
+from app.services.metrics import PUBLISH_SECONDS, PUBLISH_TOTAL, SCHEDULER_LAG_SECONDS
+
+logger = logging.getLogger("VidReacherPublisher")
+
+PUBLISH_WORKERS_PER_PLATFORM = int(os.getenv("PUBLISH_WORKERS_PER_PLATFORM", "8"))
+# Claimed-but-unfinished posts allowed per platform (bounds memory and DB claims)
+PUBLISH_QUEUE_DEPTH = int(os.getenv("PUBLISH_QUEUE_DEPTH", str(PUBLISH_WORKERS_PER_PLATFORM * 4)))
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "5"))
+PUBLISH_BACKOFF_BASE = float(os.getenv("PUBLISH_BACKOFF_BASE", "30"))      # seconds
+PUBLISH_BACKOFF_MAX = float(os.getenv("PUBLISH_BACKOFF_MAX", "3600"))
+# How long a worker waits for a platform token before handing the post back
+PLATFORM_TOKEN_WAIT = float(os.getenv("PUBLISH_PLATFORM_TOKEN_WAIT", "10"))
+
+# Posts per second allowed per platform (burst = 4x rate) and per account
+PLATFORM_RATES = {
+    "instagram": float(os.getenv("PUBLISH_RATE_INSTAGRAM", "5")),
+    "facebook": float(os.getenv("PUBLISH_RATE_FACEBOOK", "5")),
+    "youtube": float(os.getenv("PUBLISH_RATE_YOUTUBE", "2")),
+}
+DEFAULT_PLATFORM_RATE = float(os.getenv("PUBLISH_RATE_DEFAULT", "5"))
+ACCOUNT_RATE = float(os.getenv("PUBLISH_ACCOUNT_RATE", "0.2"))
+ACCOUNT_BURST = int(os.getenv("PUBLISH_ACCOUNT_BURST", "5"))
+
+# A 'publishing' claim older than this is presumed abandoned (its process died) and re-queued
+PUBLISH_CLAIM_LEASE = float(os.getenv("PUBLISH_CLAIM_LEASE", "900"))
+
+STATUS_FLUSH_INTERVAL = 0.25
+CLAIM_POLL_INTERVAL = 0.1
+
+
+# -------- publishers --------
+class PublishError(Exception):
+    """Raised by publishers. retryable=False sends the post straight to dead_letter."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Publisher:
+    """Interface for platform publishers. publish() returns the platform's post id (or None)."""
+
+    def publish(self, post: dict) -> Optional[str]:
+        raise NotImplementedError
+
+
+class LogPublisher(Publisher):
+    """Default publisher: logs the post (the previous behaviour of process_scheduled_posts)."""
+
+    def publish(self, post: dict) -> Optional[str]:
+        logger.info(f"[✅ POSTED] {(post['platform'] or '').upper()} - {(post['caption'] or '')[:50]}... at {datetime.utcnow()}")
+        return None
+
+
+class FakePublisher(Publisher):
+    """Local stand-in for tests and benchmarks with configurable latency and failure rates."""
+
+    def __init__(self, latency_ms: float = 20, failure_rate: float = 0.0, permanent_failure_rate: float = 0.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.permanent_failure_rate = permanent_failure_rate
+        self.published: List[int] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def publish(self, post: dict) -> Optional[str]:
+        time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.permanent_failure_rate:
+            raise PublishError("fake permanent failure", retryable=False)
+        if roll < self.permanent_failure_rate + self.failure_rate:
+            raise PublishError("fake transient failure")
+        with self._lock:
+            self.published.append(post["id"])
+        return f"fake-{post['id']}"
+
+
+_publishers: Dict[str, Publisher] = {}
+_default_publisher: Publisher = FakePublisher() if os.getenv("PUBLISHER_BACKEND") == "fake" else LogPublisher()
+
+def register_publisher(platform: str, publisher: Publisher):
+    _publishers[platform] = publisher
+
+def set_default_publisher(publisher: Publisher):
+    global _default_publisher
+    _default_publisher = publisher
+
+def get_publisher(platform: str) -> Publisher:
+    return _publishers.get(platform, _default_publisher)
+
+
+# -------- rate limiting --------
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if available (returns 0), else return seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> float:
+        return self._reserve()
+
+    def reserve(self) -> float:
+        """Always take a token, borrowing against future refills; returns seconds until it is valid.
+
+        Successive callers get successive slots (1/rate apart), so a backlog is spread at exactly the rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class RateLimiters:
+    def __init__(self):
+        self._platform: Dict[str, TokenBucket] = {}
+        self._account: Dict[tuple, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def platform(self, platform: str) -> TokenBucket:
+        with self._lock:
+            if platform not in self._platform:
+                rate = PLATFORM_RATES.get(platform, DEFAULT_PLATFORM_RATE)
+                self._platform[platform] = TokenBucket(rate, max(1.0, rate * 4))
+            return self._platform[platform]
+
+    def account(self, platform: str, account_id: str) -> TokenBucket:
+        key = (platform, account_id)
+        with self._lock:
+            if key not in self._account:
+                self._account[key] = TokenBucket(ACCOUNT_RATE, ACCOUNT_BURST)
+            return self._account[key]
+
+
+# -------- status writes --------
+_table = ScheduledPost.__table__
+# Only the dispatcher still holding the claim may write the result; a post whose lease expired
+# and was re-claimed elsewhere is left to its new owner.
+_RESULT_UPDATE = update(_table).where(
+    _table.c.id == bindparam("b_id"), _table.c.claim_token == bindparam("b_token")
+)
+
+
+class _StatusWriter:
+    """Collects post status changes from workers and applies them as batched UPDATEs,
+    so thousands of completions don't each pay for their own transaction."""
+
+    def __init__(self, on_requeued: Optional[Callable[[datetime], None]] = None):
+        self.on_requeued = on_requeued
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def put(self, values: dict):
+        with self._lock:
+            self._pending.append(values)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="publish-status-writer")
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(STATUS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write publish results: {e}")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            db = SessionLocal()
+            try:
+                db.execute(_RESULT_UPDATE, batch)
+                db.commit()
+            except Exception:
+                with self._lock:
+                    self._pending = batch + self._pending  # retry on the next tick
+                raise
+            finally:
+                db.close()
+            # deferred/retried posts are only visible as pending once written; wake the dispatcher for them
+            requeued = [v["next_attempt_at"] for v in batch if v["status"] == "pending" and v["next_attempt_at"]]
+            if requeued and self.on_requeued is not None:
+                self.on_requeued(min(requeued))
+
+
+# -------- pool --------
+class PublishingPool:
+    """Bounded per-platform worker pools fed by the scheduler's due-post dispatcher."""
+
+    def __init__(self):
+        self.limiters = RateLimiters()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._inflight: Dict[str, int] = {}
+        self._reserved: Dict[int, float] = {}   # post id -> monotonic time its account slot opens
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._writer = _StatusWriter()
+        atexit.register(self._writer.flush)
+
+    def _executor(self, platform: str) -> ThreadPoolExecutor:
+        if platform not in self._executors:
+            self._executors[platform] = ThreadPoolExecutor(
+                max_workers=PUBLISH_WORKERS_PER_PLATFORM, thread_name_prefix=f"publish-{platform}"
+            )
+        return self._executors[platform]
+
+    def _free_slots(self, platform: str) -> int:
+        with self._lock:
+            return PUBLISH_QUEUE_DEPTH - self._inflight.get(platform, 0)
+
+    def _submit(self, post: dict):
+        platform = post["platform"]
+        with self._lock:
+            self._inflight[platform] = self._inflight.get(platform, 0) + 1
+            executor = self._executor(platform)
+        future = executor.submit(self._run, post)
+        future.add_done_callback(lambda _f, p=platform: self._done(p))
+
+    def _done(self, platform: str):
+        with self._lock:
+            self._inflight[platform] -= 1
+            if not any(self._inflight.values()):
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until every submitted post finished and its status was written."""
+        with self._lock:
+            ok = self._idle.wait_for(lambda: not any(self._inflight.values()), timeout)
+        self._writer.flush()
+        return ok
+
+    def on_requeued(self, fn: Callable[[datetime], None]):
+        """fn(earliest) is called with the earliest next_attempt_at of posts handed back as pending."""
+        self._writer.on_requeued = fn
+
+    # ---- dispatch ----
+    def _claim(self, db, platform: str, limit: int, now: datetime) -> List[dict]:
+        """Move up to `limit` due posts of a platform to 'publishing' under a fresh claim token
+        and return only the rows this call actually claimed.
+
+        The UPDATE re-checks status='pending', so when several dispatchers race for the same rows
+        each row ends up with exactly one token; re-selecting by token drops the ones we lost.
+        """
+        token = uuid.uuid4().hex
+        due = select(ScheduledPost.id).where(
+            ScheduledPost.status == "pending",
+            ScheduledPost.scheduled_time <= now,
+            ScheduledPost.platform == platform,
+            (ScheduledPost.next_attempt_at.is_(None)) | (ScheduledPost.next_attempt_at <= now),
+        ).order_by(ScheduledPost.scheduled_time).limit(limit).scalar_subquery()
+        res = db.execute(
+            update(ScheduledPost)
+            .where(ScheduledPost.id.in_(due), ScheduledPost.status == "pending")
+            .values(status="publishing", claim_token=token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if not res.rowcount:
+            return []
+        rows = db.query(
+            ScheduledPost.id, ScheduledPost.platform, ScheduledPost.account_id, ScheduledPost.caption,
+            ScheduledPost.scheduled_time, ScheduledPost.attempts, ScheduledPost.claim_token,
+        ).filter(ScheduledPost.claim_token == token).order_by(ScheduledPost.scheduled_time).all()
+        return [dict(r._mapping) for r in rows]
+
+    def _due_platforms(self, db, now: datetime) -> List[str]:
+        rows = db.query(ScheduledPost.platform).filter(
+            ScheduledPost.status == "pending",
+            ScheduledPost.scheduled_time <= now,
+            (ScheduledPost.next_attempt_at.is_(None)) | (ScheduledPost.next_attempt_at <= now),
+        ).distinct().all()
+        return [r[0] for r in rows]
+
+    def dispatch_due(self) -> int:
+        """Claim and hand out due posts until none are left, as fast as worker slots free up."""
+        self.recover_stale_claims()
+        self._prune_reserved()
+        db = SessionLocal()
+        dispatched = 0
+        try:
+            while True:
+                now = datetime.utcnow()
+                platforms = self._due_platforms(db, now)
+                if not platforms:
+                    return dispatched
+                claimed = 0
+                for platform in platforms:
+                    free = self._free_slots(platform)
+                    if free <= 0:
+                        continue
+                    for post in self._claim(db, platform, free, now):
+                        SCHEDULER_LAG_SECONDS.labels("posts").observe((now - post["scheduled_time"]).total_seconds())
+                        self._submit(post)
+                        claimed += 1
+                dispatched += claimed
+                if not claimed:
+                    time.sleep(CLAIM_POLL_INTERVAL)
+        finally:
+            db.close()
+
+    def recover_stale_claims(self, lease: float = None):
+        """Return posts whose 'publishing' claim outlived the lease (their dispatcher died) to the queue.
+
+        Live claims of other workers sharing the DB are younger than the lease and left alone.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=PUBLISH_CLAIM_LEASE if lease is None else lease)
+        db = SessionLocal()
+        try:
+            n = db.query(ScheduledPost).filter(
+                ScheduledPost.status == "publishing",
+                (ScheduledPost.claimed_at.is_(None)) | (ScheduledPost.claimed_at < cutoff),
+            ).update(
+                {ScheduledPost.status: "pending", ScheduledPost.claim_token: None, ScheduledPost.claimed_at: None},
+                synchronize_session=False,
+            )
+            db.commit()
+            if n:
+                logger.info(f"Re-queued {n} post(s) with an expired 'publishing' claim")
+            return n
+        finally:
+            db.close()
+
+    def _prune_reserved(self):
+        """Forget account slots nobody came back for within the lease (post deleted, cancelled or failed)."""
+        expired = time.monotonic() - PUBLISH_CLAIM_LEASE
+        with self._lock:
+            for post_id in [p for p, slot in self._reserved.items() if slot < expired]:
+                del self._reserved[post_id]
+
+    # ---- worker ----
+    def _result(self, post: dict, status: str, attempts: int, next_attempt_at=None,
+                last_error=None, external_id=None, posted_at=None):
+        # every update carries the same keys so the writer can batch them into one executemany
+        self._writer.put({
+            "b_id": post["id"], "b_token": post["claim_token"],
+            "status": status, "attempts": attempts, "next_attempt_at": next_attempt_at,
+            "last_error": last_error, "external_id": external_id, "posted_at": posted_at,
+            "claim_token": None, "claimed_at": None,
+        })
+
+    def _defer(self, post: dict, wait: float):
+        PUBLISH_TOTAL.labels(post["platform"], "deferred").inc()
+        self._result(post, "pending", post["attempts"] or 0,
+                     next_attempt_at=datetime.utcnow() + timedelta(seconds=wait))
+
+    def _account_slot(self, post: dict) -> float:
+        """Seconds until the post may use its account's budget (0 = now).
+
+        A post over budget reserves the next free slot, so a backlog of N posts is deferred
+        to N distinct times 1/rate apart instead of all retrying at the same moment.
+        """
+        with self._lock:
+            slot = self._reserved.pop(post["id"], None)
+        if slot is None:
+            wait = self.limiters.account(post["platform"], post["account_id"]).reserve()
+            if not wait:
+                return 0.0
+            slot = time.monotonic() + wait
+        wait = slot - time.monotonic()
+        if wait > 0:
+            with self._lock:
+                self._reserved[post["id"]] = slot
+            return wait
+        return 0.0
+
+    def _run(self, post: dict):
+        platform = post["platform"]
+        try:
+            if post["account_id"]:
+                wait = self._account_slot(post)
+                if wait:
+                    # don't hold a worker for a single busy account; come back when its slot opens
+                    self._defer(post, wait)
+                    return
+            if not self.limiters.platform(platform).acquire(PLATFORM_TOKEN_WAIT):
+                if post["account_id"]:
+                    with self._lock:
+                        self._reserved[post["id"]] = time.monotonic()  # keep the account slot already paid for
+                self._defer(post, PLATFORM_TOKEN_WAIT)
+                return
+            start = time.perf_counter()
+            try:
+                external_id = get_publisher(platform).publish(post)
+            finally:
+                PUBLISH_SECONDS.labels(platform).observe(time.perf_counter() - start)
+            PUBLISH_TOTAL.labels(platform, "posted").inc()
+            self._result(post, "posted", (post["attempts"] or 0) + 1,
+                         external_id=external_id, posted_at=datetime.utcnow())
+        except Exception as e:
+            self._fail(post, e)
+
+    def _fail(self, post: dict, error: Exception):
+        with self._lock:
+            self._reserved.pop(post["id"], None)
+        attempts = (post["attempts"] or 0) + 1
+        retryable = getattr(error, "retryable", True)
+        if not retryable or attempts >= PUBLISH_MAX_ATTEMPTS:
+            PUBLISH_TOTAL.labels(post["platform"], "dead_letter").inc()
+            logger.error(f"[☠️ DEAD LETTER] post {post['id']} after {attempts} attempt(s): {error}")
+            self._result(post, "dead_letter", attempts, last_error=str(error))
+            return
+        backoff = min(PUBLISH_BACKOFF_MAX, PUBLISH_BACKOFF_BASE * 2 ** (attempts - 1))
+        backoff *= random.uniform(0.8, 1.2)
+        PUBLISH_TOTAL.labels(post["platform"], "retry").inc()
+        logger.warning(f"Publish of post {post['id']} failed (attempt {attempts}), retrying in {backoff:.0f}s: {error}")
+        self._result(post, "pending", attempts, last_error=str(error),
+                     next_attempt_at=datetime.utcnow() + timedelta(seconds=backoff))
+
+
+publishing_pool = PublishingPool()
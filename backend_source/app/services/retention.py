@@ -0,0 +1,173 @@
+# backend_source/app/services/retention.py
+import os
+import gzip
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import Integer, String, and_, cast, func, null, or_
+from app.db.models_auth import SessionLocal, AnalyticsSnapshot, engine
+from app.services.metrics import timed_job
+
+logger = logging.getLogger("AnalyticsRetention")
+
+# Snapshots newer than this keep full resolution
+RETENTION_FULL_DAYS = int(os.getenv("RETENTION_FULL_DAYS", "90"))
+# Older than this they are archived and removed entirely (0 = keep the daily series forever)
+RETENTION_MAX_DAYS = int(os.getenv("RETENTION_MAX_DAYS", "730"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+# Small batches + a pause between them keep each write transaction (and SQLite's lock) short
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_BATCH_PAUSE = float(os.getenv("RETENTION_BATCH_PAUSE", "0.05"))
+# Pages handed back per PRAGMA incremental_vacuum step
+VACUUM_PAGES_PER_STEP = 2000
+
+COLUMNS = [c.name for c in AnalyticsSnapshot.__table__.columns]
+# raw=None on insert is stored as JSON 'null' rather than SQL NULL; neither holds a payload
+HAS_RAW = and_(AnalyticsSnapshot.raw.isnot(None), cast(AnalyticsSnapshot.raw, String) != "null")
+
+
+def _row_dict(row: AnalyticsSnapshot) -> dict:
+    d = {c: getattr(row, c) for c in COLUMNS}
+    d["timestamp"] = row.timestamp.isoformat() if row.timestamp else None
+    return d
+
+
+def archive_rows(rows: List[AnalyticsSnapshot], reason: str):
+    """Append rows as NDJSON to gzip files partitioned by snapshot date.
+
+    Each call appends a new gzip member, so files stay readable with zcat / gzip.open.
+    """
+    by_day: Dict[str, List[str]] = {}
+    for row in rows:
+        day = row.timestamp.strftime("%Y-%m-%d") if row.timestamp else "unknown"
+        by_day.setdefault(day, []).append(json.dumps(_row_dict(row), default=str))
+    for day, lines in by_day.items():
+        folder = os.path.join(ARCHIVE_DIR, "analytics_snapshots", f"date={day}")
+        os.makedirs(folder, exist_ok=True)
+        with gzip.open(os.path.join(folder, f"{reason}.ndjson.gz"), "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _delete_batch(db, ids: List[int]):
+    db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    time.sleep(RETENTION_BATCH_PAUSE)
+
+
+def expire_old(db, cutoff: datetime) -> int:
+    """Archive and delete every snapshot older than cutoff, one batch per transaction."""
+    total = 0
+    while True:
+        rows = db.query(AnalyticsSnapshot).filter(
+            AnalyticsSnapshot.timestamp < cutoff
+        ).order_by(AnalyticsSnapshot.id).limit(RETENTION_BATCH_SIZE).all()
+        if not rows:
+            return total
+        archive_rows(rows, "expired")
+        _delete_batch(db, [r.id for r in rows])
+        total += len(rows)
+
+
+def downsample(db, start: datetime, end: datetime) -> Dict[str, int]:
+    """Reduce snapshots in [start, end) to the last one per account per day.
+
+    Dropped rows are archived then deleted; kept rows are archived with their raw
+    payload and compacted to raw=NULL. Only account-days that still have more than one
+    row or a raw payload are read, so re-runs over already reduced history stay cheap.
+    """
+    dropped = compacted = 0
+    day = func.date(AnalyticsSnapshot.timestamp)
+    pending = db.query(AnalyticsSnapshot.platform, AnalyticsSnapshot.account_id,
+                       func.min(AnalyticsSnapshot.timestamp), func.max(AnalyticsSnapshot.timestamp)).filter(
+        AnalyticsSnapshot.timestamp >= start, AnalyticsSnapshot.timestamp < end
+    ).group_by(AnalyticsSnapshot.platform, AnalyticsSnapshot.account_id, day).having(
+        or_(func.count() > 1, func.sum(HAS_RAW.cast(Integer)) > 0)
+    ).all()
+    # per account, the span covering every day that needs work
+    spans: Dict[tuple, List[datetime]] = {}
+    for platform, account_id, first, last in pending:
+        span = spans.setdefault((platform, account_id), [first, last])
+        span[0], span[1] = min(span[0], first), max(span[1], last)
+    for (platform, account_id), (first, last) in spans.items():
+        series = db.query(AnalyticsSnapshot.id, AnalyticsSnapshot.timestamp, HAS_RAW).filter(
+            AnalyticsSnapshot.platform == platform,
+            AnalyticsSnapshot.account_id == account_id,
+            AnalyticsSnapshot.timestamp >= max(start, datetime.combine(first.date(), datetime.min.time())),
+            AnalyticsSnapshot.timestamp <= last,
+        ).order_by(AnalyticsSnapshot.timestamp.desc()).all()
+        seen_days = set()
+        drop_ids, compact_ids = [], []
+        for sid, ts, has_raw in series:
+            day = ts.date()
+            if day in seen_days:
+                drop_ids.append(sid)
+            else:
+                seen_days.add(day)
+                if has_raw:
+                    compact_ids.append(sid)
+        for i in range(0, len(drop_ids), RETENTION_BATCH_SIZE):
+            batch = drop_ids[i:i + RETENTION_BATCH_SIZE]
+            archive_rows(db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.id.in_(batch)).all(), "downsampled")
+            _delete_batch(db, batch)
+            dropped += len(batch)
+        for i in range(0, len(compact_ids), RETENTION_BATCH_SIZE):
+            batch = compact_ids[i:i + RETENTION_BATCH_SIZE]
+            archive_rows(db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.id.in_(batch)).all(), "compacted")
+            db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.id.in_(batch)).update(
+                {AnalyticsSnapshot.raw: null()}, synchronize_session=False
+            )
+            db.commit()
+            time.sleep(RETENTION_BATCH_PAUSE)
+            compacted += len(batch)
+    return {"downsampled": dropped, "compacted": compacted}
+
+
+def reclaim_space() -> int:
+    """Return freed SQLite pages to the filesystem in small incremental steps.
+
+    Needs auto_vacuum=INCREMENTAL, which only applies to DB files created with it;
+    otherwise freed pages are simply reused by later inserts.
+    """
+    if engine.dialect.name != "sqlite":
+        return 0
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            logger.info("auto_vacuum is not INCREMENTAL; freed pages will be reused in place")
+            return 0
+        start = free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        while free:
+            # sqlite3.execute() stops after the first freed page; executescript steps the pragma to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP});")
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free:
+                break
+            free = remaining
+            time.sleep(RETENTION_BATCH_PAUSE)
+        return start - free
+    finally:
+        raw.close()
+
+
+@timed_job("analytics_retention")
+def run_retention(now: datetime = None) -> Dict[str, int]:
+    """Apply the retention policy: archive+expire, downsample+compact, then reclaim space."""
+    now = now or datetime.utcnow()
+    full_cutoff = now - timedelta(days=RETENTION_FULL_DAYS)
+    db = SessionLocal()
+    try:
+        expired = 0
+        floor = datetime.min
+        if RETENTION_MAX_DAYS:
+            floor = now - timedelta(days=RETENTION_MAX_DAYS)
+            expired = expire_old(db, floor)
+        result = downsample(db, floor, full_cutoff)
+        result["expired"] = expired
+    finally:
+        db.close()
+    result["reclaimed_pages"] = reclaim_space()
+    logger.info("Retention done: %s", result)
+    return result
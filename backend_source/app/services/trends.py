@@ -0,0 +1,208 @@
+# backend_source/app/services/trends.py
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func
+from app.db.models_auth import AnalyticsSnapshot
+
+TREND_METRICS = ("followers", "views", "likes", "comments", "impressions", "reach", "watch_time")
+# Extra history loaded before the requested window so 28-day averages/baselines are defined from day one
+LOOKBACK_DAYS = 28
+SPIKE_Z = float(os.getenv("TREND_SPIKE_Z", "3.0"))
+# Floor for the spike baseline's std-dev: a flat or perfectly steady series has sd == 0, and a jump
+# out of it is exactly the spike to report. Floor = max(sd, SPIKE_REL_SD * |mean change|, SPIKE_MIN_SD).
+SPIKE_MIN_SD = float(os.getenv("TREND_SPIKE_MIN_SD", "1.0"))
+SPIKE_REL_SD = float(os.getenv("TREND_SPIKE_REL_SD", "0.1"))
+# Above this many stale accounts, load the whole platform instead of an IN (...) list
+MAX_IN_ACCOUNTS = 500
+
+# Distinct (platform, metric, days, include_series) combinations kept; least recently used go first
+TRENDS_CACHE_KEYS = int(os.getenv("TRENDS_CACHE_KEYS", "64"))
+
+# (platform, metric, days, include_series) -> {"day": date, "entries": {account: (latest_id, result)}}
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# -------- loading --------
+def load_daily_matrix(db, platform: str, metric: str, start_day: date, n_days: int,
+                      accounts: Optional[List[str]] = None):
+    """Load a metric as an (accounts x days) matrix of end-of-day values, forward-filled.
+
+    Returns (account_ids, matrix). Days without any earlier value stay NaN.
+    """
+    col = getattr(AnalyticsSnapshot, metric)
+    q = db.query(AnalyticsSnapshot.account_id, AnalyticsSnapshot.timestamp, col).filter(
+        AnalyticsSnapshot.platform == platform,
+        AnalyticsSnapshot.timestamp >= datetime.combine(start_day, datetime.min.time()),
+        col.isnot(None),
+    )
+    if accounts is not None:
+        q = q.filter(AnalyticsSnapshot.account_id.in_(accounts))
+    rows = q.order_by(AnalyticsSnapshot.account_id, AnalyticsSnapshot.timestamp).all()
+    if not rows:
+        return [], np.empty((0, n_days))
+
+    acc_raw, ts_raw, val_raw = zip(*rows)
+    account_ids, acc_idx = np.unique(np.array(acc_raw, dtype=object), return_inverse=True)
+    ts = np.array(ts_raw, dtype="datetime64[us]")
+    day_idx = (ts.astype("datetime64[D]") - np.datetime64(start_day, "D")).astype(np.int64)
+    values = np.array(val_raw, dtype=np.float64)
+    keep = (day_idx >= 0) & (day_idx < n_days)
+    acc_idx, day_idx, values = acc_idx[keep], day_idx[keep], values[keep]
+
+    # rows are sorted by (account, time): the last row of each (account, day) run is the end-of-day value
+    key = acc_idx * n_days + day_idx
+    last = np.ones(len(key), dtype=bool)
+    last[:-1] = key[1:] != key[:-1]
+    matrix = np.full((len(account_ids), n_days), np.nan)
+    matrix[acc_idx[last], day_idx[last]] = values[last]
+    return list(account_ids), _ffill(matrix)
+
+
+def _ffill(m: np.ndarray) -> np.ndarray:
+    idx = np.where(~np.isnan(m), np.arange(m.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return m[np.arange(m.shape[0])[:, None], idx]
+
+
+# -------- vectorized computations (axis 1 = days, every row an account) --------
+def rolling_mean(m: np.ndarray, w: int) -> np.ndarray:
+    """Trailing w-day mean ignoring NaN; NaN until w days are available."""
+    valid = ~np.isnan(m)
+    cs = np.cumsum(np.where(valid, m, 0.0), axis=1)
+    cnt = np.cumsum(valid, axis=1)
+    cs = np.pad(cs, ((0, 0), (1, 0)))
+    cnt = np.pad(cnt, ((0, 0), (1, 0)))
+    s = cs[:, w:] - cs[:, :-w]
+    n = cnt[:, w:] - cnt[:, :-w]
+    out = np.full(m.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[:, w - 1:] = np.where(n > 0, s / n, np.nan)
+    return out
+
+
+def rolling_std(m: np.ndarray, w: int) -> np.ndarray:
+    mean = rolling_mean(m, w)
+    mean_sq = rolling_mean(m * m, w)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def growth_rate(m: np.ndarray, w: int) -> np.ndarray:
+    """Relative change over the last w days."""
+    base = m[:, -1 - w]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(base > 0, (m[:, -1] - base) / base, np.nan)
+
+
+def velocity(m: np.ndarray, w: int = 7) -> np.ndarray:
+    """Least-squares slope (units per day) over the last w days."""
+    y = m[:, -w:]
+    x = np.arange(w, dtype=np.float64)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xm = np.where(valid, x, 0).sum(axis=1) / n
+        ym = np.where(valid, y, 0).sum(axis=1) / n
+        dx = np.where(valid, x - xm[:, None], 0)
+        dy = np.where(valid, y - ym[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(n >= 2, slope, np.nan)
+
+
+def spike_scores(m: np.ndarray, w: int = 28) -> np.ndarray:
+    """z-score of each day's change against the trailing w days of changes (excluding itself)."""
+    delta = np.full(m.shape, np.nan)
+    delta[:, 1:] = np.diff(m, axis=1)
+    mu = np.full(m.shape, np.nan)
+    sd = np.full(m.shape, np.nan)
+    mu[:, 1:] = rolling_mean(delta, w)[:, :-1]
+    sd[:, 1:] = rolling_std(delta, w)[:, :-1]
+    sd = np.maximum(np.fmax(sd, SPIKE_REL_SD * np.abs(mu)), SPIKE_MIN_SD)
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isnan(mu), np.nan, (delta - mu) / sd)
+
+
+def _f(v) -> Optional[float]:
+    return None if v is None or np.isnan(v) else round(float(v), 4)
+
+
+def compute_trends(account_ids: List[str], m: np.ndarray, start_day: date, days: int, include_series: bool) -> Dict[str, dict]:
+    """Score every account row of the matrix at once; only the last `days` columns are reported."""
+    if not account_ids:
+        return {}
+    ma7, ma28 = rolling_mean(m, 7), rolling_mean(m, 28)
+    g1, g7, g28 = growth_rate(m, 1), growth_rate(m, 7), growth_rate(m, 28)
+    vel = velocity(m, 7)
+    z = spike_scores(m, 28)[:, -days:]
+    window_days = [start_day + timedelta(days=m.shape[1] - days + i) for i in range(days)]
+    spike_rows, spike_cols = np.nonzero(np.abs(np.nan_to_num(z)) >= SPIKE_Z)
+
+    results = {}
+    for i, account_id in enumerate(account_ids):
+        results[account_id] = {
+            "account_id": account_id,
+            "latest": _f(m[i, -1]),
+            "growth_1d": _f(g1[i]),
+            "growth_7d": _f(g7[i]),
+            "growth_28d": _f(g28[i]),
+            "ma7": _f(ma7[i, -1]),
+            "ma28": _f(ma28[i, -1]),
+            "velocity_per_day": _f(vel[i]),
+            "spikes": [],
+        }
+    for r, c in zip(spike_rows, spike_cols):
+        results[account_ids[r]]["spikes"].append({"day": window_days[c].isoformat(), "z": _f(z[r, c])})
+    if include_series:
+        for i, account_id in enumerate(account_ids):
+            results[account_id]["series"] = {
+                "days": [d.isoformat() for d in window_days],
+                "value": [_f(v) for v in m[i, -days:]],
+                "ma7": [_f(v) for v in ma7[i, -days:]],
+                "ma28": [_f(v) for v in ma28[i, -days:]],
+            }
+    return results
+
+
+# -------- cached entry point --------
+def account_trends(db, platform: str, metric: str = "followers", days: int = 30,
+                   accounts: Optional[List[str]] = None, include_series: bool = False) -> List[dict]:
+    """Trend metrics per account, recomputed only for accounts with a snapshot newer than the cached one."""
+    today = datetime.utcnow().date()
+    n_days = days + LOOKBACK_DAYS
+    start_day = today - timedelta(days=n_days - 1)
+
+    q = db.query(AnalyticsSnapshot.account_id, func.max(AnalyticsSnapshot.id)).filter(
+        AnalyticsSnapshot.platform == platform,
+        AnalyticsSnapshot.timestamp >= datetime.combine(start_day, datetime.min.time()),
+    )
+    if accounts:
+        q = q.filter(AnalyticsSnapshot.account_id.in_(accounts))
+    latest_ids = dict(q.group_by(AnalyticsSnapshot.account_id).all())
+
+    key = (platform, metric, days, include_series)
+    with _cache_lock:
+        bucket = _cache.get(key)
+        if bucket is None or bucket["day"] != today:
+            bucket = _cache[key] = {"day": today, "entries": {}}
+        _cache.move_to_end(key)
+        while len(_cache) > TRENDS_CACHE_KEYS:
+            _cache.popitem(last=False)
+        entries = dict(bucket["entries"])
+    stale = [a for a, lid in latest_ids.items() if entries.get(a, (None,))[0] != lid]
+
+    if stale:
+        subset = stale if len(stale) <= MAX_IN_ACCOUNTS else None
+        account_ids, m = load_daily_matrix(db, platform, metric, start_day, n_days, subset)
+        fresh = compute_trends(account_ids, m, start_day, days, include_series)
+        with _cache_lock:
+            for a in stale:
+                # None marks accounts without values for this metric, so they aren't reloaded every call
+                bucket["entries"][a] = entries[a] = (latest_ids[a], fresh.get(a))
+
+    out = [entries[a][1] for a in latest_ids if entries.get(a, (None, None))[1] is not None]
+    out.sort(key=lambda r: (r["growth_7d"] is None, -(r["growth_7d"] or 0)))
+    return out
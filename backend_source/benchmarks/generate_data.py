@@ -0,0 +1,108 @@
+# backend_source/benchmarks/generate_data.py
+"""
+Populate a benchmark database with synthetic accounts, snapshots and scheduled posts.
+
+    python -m benchmarks.generate_data --db sqlite:///./bench.db --snapshots 2000000 --posts 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+PLATFORMS = ["instagram", "youtube", "facebook"]
+CHUNK = 10000
+
+
+def _snapshot_rows(accounts, total, days, rng, now):
+    """Yield snapshot dicts spread evenly over `days` for every account, with growing counters."""
+    per_account = max(1, total // len(accounts))
+    step = timedelta(days=days) / per_account
+    for platform, account_id in accounts:
+        followers = rng.randint(100, 1_000_000)
+        views = followers * rng.randint(5, 50)
+        ts = now - timedelta(days=days)
+        for _ in range(per_account):
+            followers += rng.randint(-5, 50)
+            views += rng.randint(0, 5000)
+            ts += step
+            yield {
+                "platform": platform,
+                "account_id": account_id,
+                "followers": followers,
+                "views": views,
+                "likes": rng.randint(0, 10000),
+                "comments": rng.randint(0, 1000),
+                "impressions": views * 3,
+                "reach": views * 2,
+                "watch_time": rng.randint(0, 100000) if platform == "youtube" else None,
+                "raw": {"profile": {"id": account_id, "followers_count": followers}, "bench": True},
+                "timestamp": ts,
+            }
+
+
+def _post_rows(total, rng, now):
+    for i in range(total):
+        yield {
+            "platform": rng.choice(PLATFORMS),
+            "caption": f"Benchmark post {i} #creators #growth #tips about video editing and reach",
+            # half in the past (due), half in the future
+            "scheduled_time": now + timedelta(seconds=rng.randint(-30 * 86400, 30 * 86400)),
+            "status": "pending",
+            "created_at": now,
+        }
+
+
+def _insert_chunked(engine, table, rows):
+    count = 0
+    chunk = []
+    with engine.begin() as conn:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= CHUNK:
+                conn.execute(table.insert(), chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            conn.execute(table.insert(), chunk)
+            count += len(chunk)
+    return count
+
+
+def generate(snapshots: int, posts: int, accounts_per_platform: int, days: int, seed: int = 42):
+    # imported lazily so the caller can set DATABASE_URL first
+    from app.db.models import engine, init_db, ScheduledPost
+    from app.db.models_auth import init_auth_db, SocialAccount, AnalyticsSnapshot
+
+    init_db()
+    init_auth_db()
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    accounts = [(p, f"bench_{p}_{i}") for p in PLATFORMS for i in range(accounts_per_platform)]
+    n_acc = _insert_chunked(engine, SocialAccount.__table__, (
+        {"platform": p, "account_id": a, "access_token": "bench-token", "created_at": now}
+        for p, a in accounts
+    ))
+    start = time.perf_counter()
+    n_snap = _insert_chunked(engine, AnalyticsSnapshot.__table__, _snapshot_rows(accounts, snapshots, days, rng, now))
+    n_post = _insert_chunked(engine, ScheduledPost.__table__, _post_rows(posts, rng, now))
+    print(f"inserted {n_acc} accounts, {n_snap} snapshots, {n_post} posts in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default="sqlite:///./bench.db", help="SQLAlchemy URL of the benchmark DB")
+    ap.add_argument("--snapshots", type=int, default=2_000_000)
+    ap.add_argument("--posts", type=int, default=100_000)
+    ap.add_argument("--accounts", type=int, default=100, help="accounts per platform")
+    ap.add_argument("--days", type=int, default=365, help="history span of generated snapshots")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+    os.environ["DATABASE_URL"] = args.db
+    generate(args.snapshots, args.posts, args.accounts, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
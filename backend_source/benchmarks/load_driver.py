@@ -0,0 +1,244 @@
+# backend_source/benchmarks/load_driver.py
+"""
+Offline load driver: serves the API against a benchmark DB and local provider stubs,
+then reports throughput and p50/p95/p99 latency per endpoint and background job.
+
+    python -m benchmarks.generate_data --db sqlite:///./bench.db
+    python -m benchmarks.load_driver --db sqlite:///./bench.db --out run.json
+    python -m benchmarks.load_driver --db sqlite:///./bench.db --compare run.json
+
+With --compare the exit status is 1 when any p95 regressed by more than --threshold.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_server import StubConfig, start_stub_server
+
+ENDPOINTS = [
+    ("GET /analytics/overview", "GET", "/analytics/overview", None),
+    ("GET /analytics/youtube/latest", "GET", "/analytics/youtube/latest", None),
+    ("GET /analytics/youtube/history?days=7", "GET", "/analytics/youtube/history?days=7", None),
+    ("GET /analytics/instagram/history?days=30", "GET", "/analytics/instagram/history?days=30", None),
+    ("POST /ai/caption", "POST", "/ai/caption", {"text": "How we grew a cooking channel to 100k subscribers with short videos", "platform": "youtube"}),
+    ("POST /ai/tags", "POST", "/ai/tags", {"text": "Behind the scenes of editing a travel vlog in the Alps", "max_tags": 8}),
+    ("POST /ai/summary", "POST", "/ai/summary", {"transcript": "Today we cover lighting. Then audio. Then editing. Finally publishing tips.", "max_sentences": 2}),
+]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(latencies, errors, elapsed):
+    ms = [v * 1000 for v in latencies]
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(percentile(ms, 0.50), 2) if ms else None,
+        "p95_ms": round(percentile(ms, 0.95), 2) if ms else None,
+        "p99_ms": round(percentile(ms, 0.99), 2) if ms else None,
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(port: int):
+    """Run the FastAPI app under uvicorn in a daemon thread (lifespan off: no APScheduler jobs)."""
+    import uvicorn
+    from app.main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("API server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def bench_endpoint(base, method, path, body, requests_count, concurrency):
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            r = session.request(method, base + path, json=body, timeout=120)
+            r.content
+            ok = r.status_code < 500
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    for _ in range(min(5, requests_count)):
+        one(None)  # warm up connections and lazy imports
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    return summarize([r[0] for r in results], sum(1 for r in results if not r[1]), elapsed)
+
+
+def bench_job(name, fn, runs, setup=None):
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def _reset_bench_posts():
+    from sqlalchemy import update
+    from app.db.models import engine, ScheduledPost
+    with engine.begin() as conn:
+        conn.execute(
+            update(ScheduledPost)
+            .where(ScheduledPost.caption.like("Benchmark post%"))
+            .values(status="pending", attempts=0, next_attempt_at=None, posted_at=None,
+                    claim_token=None, claimed_at=None)
+        )
+
+
+def _drain_scheduled_posts():
+    from app.services.background_jobs import process_scheduled_posts
+    from app.services.publishing import publishing_pool
+    process_scheduled_posts()
+    publishing_pool.wait_idle()
+
+
+def _force_fetches_due():
+    from app.db.models_auth import SessionLocal
+    from app.services.fetch_scheduler import fetch_scheduler
+    db = SessionLocal()
+    try:
+        fetch_scheduler.force_due(db)
+    finally:
+        db.close()
+
+
+def run(args):
+    stub, stub_base = start_stub_server(0, StubConfig(args.latency_ms, args.jitter_ms, args.error_rate))
+    os.environ["DATABASE_URL"] = args.db
+    os.environ["GRAPH_API_BASE"] = f"{stub_base}/graph/v16.0"
+    os.environ["YOUTUBE_API_BASE"] = f"{stub_base}/youtube/v3"
+    os.environ["OPENAI_API_BASE"] = f"{stub_base}/openai/v1"
+    # publish through the local fake; lift platform limits so the job measures the pipeline itself
+    os.environ["PUBLISHER_BACKEND"] = "fake"
+    for platform in ("INSTAGRAM", "FACEBOOK", "YOUTUBE", "DEFAULT"):
+        os.environ.setdefault(f"PUBLISH_RATE_{platform}", str(args.publish_rate))
+    # every run fetches every account, so lift the hourly provider budgets too
+    for platform in ("INSTAGRAM", "FACEBOOK", "YOUTUBE"):
+        os.environ.setdefault(f"FETCH_BUDGET_{platform}", str(args.fetch_budget))
+    try:
+        import openai  # noqa: F401
+        os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+        provider_note = "openai client installed: /ai/* go through the stub provider"
+    except ImportError:
+        os.environ.pop("OPENAI_API_KEY", None)
+        provider_note = "openai client not installed: /ai/* measure the local fallback path"
+    print(provider_note)
+
+    port = _free_port()
+    api = start_api(port)
+    base = f"http://127.0.0.1:{port}"
+    results = {}
+    try:
+        for name, method, path, body in ENDPOINTS:
+            if args.only and args.only not in name:
+                continue
+            results[name] = bench_endpoint(base, method, path, body, args.requests, args.concurrency)
+            _print_row(name, results[name])
+
+        # the production fetch path: the due-time queue dispatcher, with every account forced due
+        from app.services.fetch_scheduler import dispatch_due_fetches
+        jobs = [
+            ("job process_scheduled_posts", _drain_scheduled_posts, _reset_bench_posts),
+            ("job dispatch_due_fetches", dispatch_due_fetches, _force_fetches_due),
+        ]
+        for name, fn, setup in jobs:
+            if args.only and args.only not in name:
+                continue
+            results[name] = bench_job(name, fn, args.job_runs, setup)
+            _print_row(name, results[name])
+    finally:
+        api.should_exit = True
+        stub.shutdown()
+    return results
+
+
+def _print_row(name, r):
+    print(f"{name:<48} n={r['count']:<5} err={r['errors']:<4} {r['throughput_rps'] or 0:>9.2f}/s "
+          f"p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+
+
+def compare(results, baseline, threshold):
+    """Print p95 deltas against a previous run. Returns the names that regressed."""
+    regressed = []
+    print("\ncomparison against baseline (p95):")
+    for name, r in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("p95_ms") or r.get("p95_ms") is None:
+            continue
+        delta = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+        flag = "REGRESSION" if delta > threshold else ""
+        print(f"  {name:<48} {old['p95_ms']:>10.2f}ms -> {r['p95_ms']:>10.2f}ms ({delta:+.1%}) {flag}")
+        if delta > threshold:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default="sqlite:///./bench.db")
+    ap.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--job-runs", type=int, default=3)
+    ap.add_argument("--latency-ms", type=float, default=50, help="stub provider latency")
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="stub provider failure rate (0-1)")
+    ap.add_argument("--publish-rate", type=float, default=100000, help="per-platform publish rate limit (posts/s)")
+    ap.add_argument("--fetch-budget", type=int, default=1000000, help="per-platform provider requests per hour")
+    ap.add_argument("--only", help="only run endpoints/jobs whose name contains this string")
+    ap.add_argument("--out", help="write results as JSON to this file")
+    ap.add_argument("--compare", help="baseline JSON from a previous --out run")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed p95 slowdown before flagging")
+    args = ap.parse_args(argv)
+
+    results = run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
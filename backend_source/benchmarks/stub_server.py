@@ -0,0 +1,131 @@
+# backend_source/benchmarks/stub_server.py
+"""
+Local stand-in for the Graph, YouTube Data and OpenAI completion endpoints.
+
+    python -m benchmarks.stub_server --port 9100 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+
+Point the app at it with
+    GRAPH_API_BASE=http://127.0.0.1:9100/graph/v16.0
+    YOUTUBE_API_BASE=http://127.0.0.1:9100/youtube/v3
+    OPENAI_API_BASE=http://127.0.0.1:9100/openai/v1
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+def _graph_profile(account_id):
+    return {"id": account_id, "followers_count": random.randint(1000, 100000)}
+
+
+def _graph_insights(account_id):
+    values = [{"value": random.randint(100, 100000), "end_time": "2024-01-01T00:00:00+0000"}]
+    return {"data": [
+        {"name": "impressions", "period": "day", "values": values},
+        {"name": "reach", "period": "day", "values": values},
+    ]}
+
+
+def _youtube_channels(query):
+    channel_id = query.get("id", ["unknown"])[0]
+    return {"items": [{"id": channel_id, "statistics": {
+        "subscriberCount": str(random.randint(1000, 100000)),
+        "viewCount": str(random.randint(100000, 10000000)),
+        "videoCount": "120",
+    }}]}
+
+
+def _openai_completion():
+    return {"choices": [{"text": "Stub caption for benchmarking #creators #growth #video", "index": 0}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig = StubConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass  # keep benchmark output clean
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.config.delay())
+        if self.config.should_fail():
+            self._reply(503, {"error": {"message": "stub injected failure", "code": 2}})
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+        m = re.match(r"^/graph/v[\d.]+/([^/]+)(/insights)?$", path)
+        if m:
+            self._reply(200, _graph_insights(m.group(1)) if m.group(2) else _graph_profile(m.group(1)))
+        elif path.startswith("/youtube/v3/channels"):
+            self._reply(200, _youtube_channels(query))
+        elif path.startswith("/openai/") and path.endswith("completions"):
+            self._reply(200, _openai_completion())
+        else:
+            self._reply(404, {"error": f"no stub for {path}"})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def start_stub_server(port: int = 0, config: StubConfig = None):
+    """Start the stub in a daemon thread. Returns (server, base_url)."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args(argv)
+    server, base = start_stub_server(args.port, StubConfig(args.latency_ms, args.jitter_ms, args.error_rate))
+    print(f"stub providers listening on {base} (ctrl-c to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
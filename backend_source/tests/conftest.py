@@ -0,0 +1,34 @@
+# backend_source/tests/conftest.py
+import os
+import tempfile
+
+# the engines are created at import time, so point them at a scratch DB before any app import
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='vidreacher-test-')}/test.db"
+
+import pytest
+from app.db.models import SessionLocal, ScheduledPost, init_db
+from app.db import models_auth
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    session.query(ScheduledPost).delete()
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def analytics_db():
+    models_auth.init_auth_db()
+    session = models_auth.SessionLocal()
+    session.query(models_auth.AnalyticsSnapshot).delete()
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
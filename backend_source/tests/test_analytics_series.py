@@ -0,0 +1,46 @@
+# backend_source/tests/test_analytics_series.py
+from datetime import datetime
+import pytest
+from app.db.models_auth import AnalyticsSnapshot
+from app.services.analytics_series import bucketed_series
+
+
+@pytest.fixture
+def snaps(analytics_db):
+    def add(ts, followers, account="acc"):
+        analytics_db.add(AnalyticsSnapshot(platform="youtube", account_id=account, followers=followers, timestamp=ts))
+        analytics_db.commit()
+    return analytics_db, add
+
+
+def test_delta_spans_buckets(snaps):
+    db, add = snaps
+    add(datetime(2024, 1, 1, 9), 100)
+    add(datetime(2024, 1, 2, 9), 150)   # one sample per day: in-bucket last - first would be 0
+    add(datetime(2024, 1, 3, 8), 160)
+    add(datetime(2024, 1, 3, 20), 190)
+    add(datetime(2024, 1, 2, 9), 7, account="other")
+    points = bucketed_series(db, "youtube", ["acc"], datetime(2024, 1, 1), "day")["acc"]
+    assert [p["bucket"] for p in points] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert [p["followers"]["last"] for p in points] == [100, 150, 190]
+    assert [p["followers"]["delta"] for p in points] == [None, 50, 40]
+    assert points[2]["samples"] == 2 and points[2]["followers"]["avg"] == 175.0
+
+
+def test_week_buckets_start_on_monday(snaps):
+    db, add = snaps
+    add(datetime(2024, 1, 1, 0), 10)    # Monday
+    add(datetime(2024, 1, 7, 23), 20)   # Sunday, same week
+    add(datetime(2024, 1, 8, 0), 35)    # next Monday
+    points = bucketed_series(db, "youtube", None, datetime(2023, 12, 1), "week")["acc"]
+    assert [(p["bucket"], p["samples"]) for p in points] == [("2024-01-01", 2), ("2024-01-08", 1)]
+    assert points[1]["followers"]["delta"] == 15
+
+
+def test_hour_bucket_key(snaps):
+    db, add = snaps
+    add(datetime(2024, 1, 1, 9, 59), 1)
+    add(datetime(2024, 1, 1, 10, 1), 4)
+    points = bucketed_series(db, "youtube", None, datetime(2024, 1, 1), "hour")["acc"]
+    assert [p["bucket"] for p in points] == ["2024-01-01T09:00:00", "2024-01-01T10:00:00"]
+    assert points[1]["followers"]["delta"] == 3
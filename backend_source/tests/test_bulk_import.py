@@ -0,0 +1,61 @@
+# backend_source/tests/test_bulk_import.py
+import pytest
+from fastapi.testclient import TestClient
+from app.db.models import ScheduledPost
+from app.main import app
+from app.routes import scheduler
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _rows(n):
+    return [{"platform": "instagram", "caption": f"post {i}", "scheduled_time": "2030-01-01T10:00:00Z"} for i in range(n)]
+
+
+def test_bulk_import_reports_row_errors(db, client):
+    rows = _rows(3) + [{"platform": "instagram", "caption": "no time"}]
+    body = client.post("/scheduler/bulk", json=rows).json()
+    assert body["inserted"] == 3
+    assert body["failed"] == 1
+    assert body["errors"][0]["row"] == 4
+    assert db.query(ScheduledPost).count() == 3
+
+
+def test_bulk_import_stores_nothing_when_a_later_chunk_fails(db, client, monkeypatch):
+    monkeypatch.setattr(scheduler, "BULK_CHUNK_ROWS", 10)
+    real_insert = scheduler.insert
+    calls = []
+
+    def failing_insert(table):
+        calls.append(table)
+        if len(calls) == 3:
+            return real_insert(table).prefix_with("OR BOGUS")  # invalid SQL on the third chunk
+        return real_insert(table)
+
+    monkeypatch.setattr(scheduler, "insert", failing_insert)
+    r = client.post("/scheduler/bulk", json=_rows(35))
+    assert r.status_code == 500
+    assert "no rows were stored" in r.json()["detail"]
+    assert db.query(ScheduledPost).count() == 0
+
+
+def test_default_chunks_fit_the_old_sqlite_variable_limit(db, client, monkeypatch):
+    real_insert = scheduler.insert
+    params = []
+
+    class Recording:
+        def __init__(self, table):
+            self.stmt = real_insert(table)
+
+        def values(self, rows):
+            params.append(sum(len(r) for r in rows))
+            return self.stmt.values(rows)
+
+    monkeypatch.setattr(scheduler, "insert", Recording)
+    r = client.post("/scheduler/bulk", json=_rows(300))
+    assert r.json()["inserted"] == 300
+    assert len(params) == 3
+    assert max(params) <= scheduler.SQLITE_MAX_VARIABLES
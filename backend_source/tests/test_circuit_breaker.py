@@ -0,0 +1,163 @@
+# backend_source/tests/test_circuit_breaker.py
+from datetime import datetime
+import pytest
+from app.db.models_auth import SessionLocal, SocialAccount, AnalyticsSnapshot, init_auth_db
+from app.services import analytics_fetchers, circuit_breaker, fetch_scheduler
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+from benchmarks.stub_server import StubConfig, start_stub_server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", c)
+    return c
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+def _trip(cb):
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+        cb.allow()
+        cb.record_failure(0.1, "HTTP 503")
+
+
+def test_consecutive_failures_open_the_breaker(clock):
+    cb = CircuitBreaker("p", "e")
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD - 1):
+        cb.allow()
+        cb.record_failure(0.1, "HTTP 503")
+    cb.allow()
+    cb.record_success(0.1)  # a success resets the streak
+    assert cb.state == CLOSED
+    _trip(cb)
+    assert cb.state == OPEN
+    with pytest.raises(CircuitOpenError) as err:
+        cb.allow()
+    assert err.value.retry_at == clock.now + circuit_breaker.OPEN_SECONDS
+
+
+def test_slow_calls_open_the_breaker(clock):
+    cb = CircuitBreaker("p", "e")
+    for _ in range(circuit_breaker.MIN_CALLS):
+        cb.allow()
+        cb.record_success(circuit_breaker.SLOW_CALL_SECONDS + 1)
+    assert cb.state == OPEN
+
+
+def test_open_goes_half_open_after_cool_down_and_limits_probes(clock):
+    cb = CircuitBreaker("p", "e")
+    _trip(cb)
+    clock.now += circuit_breaker.OPEN_SECONDS
+    for _ in range(circuit_breaker.HALF_OPEN_PROBES):
+        cb.allow()
+    assert cb.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        cb.allow()
+
+
+def test_failed_probe_reopens_with_a_longer_open_time(clock):
+    cb = CircuitBreaker("p", "e")
+    _trip(cb)
+    clock.now += circuit_breaker.OPEN_SECONDS
+    cb.allow()
+    cb.record_failure(0.1, "timeout")
+    assert cb.state == OPEN
+    assert cb.retry_at == clock.now + 2 * circuit_breaker.OPEN_SECONDS
+
+
+def test_successful_probes_close_the_breaker(clock):
+    cb = CircuitBreaker("p", "e")
+    changes = []
+    cb.add_listener(lambda b, old, new: changes.append((old, new)))
+    _trip(cb)
+    clock.now += circuit_breaker.OPEN_SECONDS
+    for _ in range(circuit_breaker.HALF_OPEN_PROBES):
+        cb.allow()
+        cb.record_success(0.1)
+    assert cb.state == CLOSED
+    assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert cb.open_seconds == circuit_breaker.OPEN_SECONDS
+
+
+# ---- fetchers and scheduler ----
+@pytest.fixture
+def account():
+    init_auth_db()
+    db = SessionLocal()
+    db.query(SocialAccount).delete()
+    db.query(AnalyticsSnapshot).delete()
+    acc = SocialAccount(platform="youtube", account_id="chan", access_token="t")
+    db.add(acc)
+    db.commit()
+    try:
+        yield db, acc
+    finally:
+        db.close()
+
+
+def test_error_responses_store_no_snapshot(account, monkeypatch):
+    db, acc = account
+    server, base = start_stub_server(0, StubConfig(latency_ms=0, jitter_ms=0, error_rate=1.0))
+    try:
+        monkeypatch.setattr(analytics_fetchers, "YOUTUBE_API_BASE", f"{base}/youtube/v3")
+        assert analytics_fetchers.fetch_account(acc, db) is None
+    finally:
+        server.shutdown()
+    assert db.query(AnalyticsSnapshot).count() == 0
+
+
+def test_scheduler_refunds_budget_and_requeues_on_recovery(account, monkeypatch):
+    db, acc = account
+    monkeypatch.setattr(fetch_scheduler, "CATCHUP_SPREAD", 0)
+    monkeypatch.setattr(fetch_scheduler, "RECOVERY_SPREAD", 0)
+    scheduler = fetch_scheduler.FetchScheduler()
+    far_future = datetime.utcnow().timestamp() + 3600
+    calls = []
+
+    def down(acc, db):
+        calls.append(acc.id)
+        raise CircuitOpenError("youtube:*", far_future)
+
+    monkeypatch.setattr(fetch_scheduler, "fetch_account", down)
+    scheduler.run_due()
+    assert calls == [acc.id]
+    assert not scheduler._sent["youtube"]          # the skipped fetch's budget was given back
+    assert scheduler.deferred() == {"youtube:*": 1}
+    assert scheduler._entries[acc.id]["due"] == far_future
+
+    monkeypatch.setattr(fetch_scheduler, "fetch_account", lambda acc, db: calls.append(acc.id))
+    scheduler.run_due()
+    assert len(calls) == 1                          # still waiting on the breaker
+
+    scheduler._on_circuit_change(CircuitBreaker("youtube"), HALF_OPEN, CLOSED)
+    scheduler.run_due()
+    assert calls == [acc.id, acc.id]
+    assert scheduler.deferred() == {}
+    assert len(scheduler._sent["youtube"]) == 1
+
+
+@pytest.mark.parametrize("status, outcome", [(503, "error"), (429, "rate_limited")])
+def test_fetch_outcome_follows_the_http_result(account, monkeypatch, status, outcome):
+    from app.services.metrics import FETCH_TOTAL
+    db, acc = account
+
+    class Response:
+        status_code = status
+
+    monkeypatch.setattr(analytics_fetchers.requests, "get", lambda *a, **kw: Response())
+    counter = FETCH_TOTAL.labels("youtube", outcome)
+    before = counter._value.get()
+    assert analytics_fetchers.fetch_account(acc, db) is None
+    assert counter._value.get() == before + 1
@@ -0,0 +1,64 @@
+# backend_source/tests/test_export.py
+import io
+import csv
+import json
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.db.models_auth import AnalyticsSnapshot
+from app.main import app
+from app.services import analytics_export
+
+
+@pytest.fixture
+def client(analytics_db):
+    for day in (1, 2, 3):
+        analytics_db.add(AnalyticsSnapshot(platform="youtube", account_id="acc", followers=day * 10,
+                                           raw={"day": day}, timestamp=datetime(2024, 5, day, 12)))
+    analytics_db.add(AnalyticsSnapshot(platform="instagram", account_id="ig", followers=7, timestamp=datetime(2024, 5, 2)))
+    analytics_db.commit()
+    return TestClient(app)
+
+
+def test_csv_export(client):
+    resp = client.get("/analytics/export", params={"format": "csv", "platforms": "youtube"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["followers"] for r in rows] == ["10", "20", "30"]
+    assert "raw" not in rows[0]
+
+
+def test_ndjson_export_with_raw(client):
+    resp = client.get("/analytics/export", params={"format": "ndjson", "accounts": "acc", "include_raw": "true"})
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["raw"] for r in rows] == [{"day": 1}, {"day": 2}, {"day": 3}]
+
+
+def test_export_date_filter_normalizes_offsets(client):
+    # 2024-05-02T14:00+02:00 is 12:00 UTC; end is exclusive
+    resp = client.get("/analytics/export", params={
+        "format": "ndjson", "platforms": "youtube",
+        "start": "2024-05-02T14:00:00+02:00", "end": "2024-05-03T12:00:00Z",
+    })
+    assert [json.loads(line)["followers"] for line in resp.text.splitlines()] == [20]
+
+
+def test_parquet_export_is_not_gzipped(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    resp = client.get("/analytics/export", params={"format": "parquet"}, headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert sorted(table.column("followers").to_pylist()) == [7, 10, 20, 30]
+
+
+def test_csv_export_is_gzipped(client, monkeypatch):
+    monkeypatch.setattr(analytics_export, "EXPORT_CHUNK_ROWS", 1)
+    resp = client.get("/analytics/export", params={"format": "csv", "include_raw": "true"},
+                      headers={"Accept-Encoding": "gzip"})
+    assert resp.headers.get("content-encoding") == "gzip"
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/analytics/export", params={"format": "xlsx"}).status_code == 400
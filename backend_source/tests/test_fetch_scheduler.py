@@ -0,0 +1,59 @@
+# backend_source/tests/test_fetch_scheduler.py
+from datetime import datetime, timedelta
+import pytest
+from app.db.models_auth import SessionLocal, AnalyticsSnapshot, init_auth_db
+from app.services.fetch_scheduler import FetchScheduler
+
+
+@pytest.fixture
+def snap_db():
+    init_auth_db()
+    session = SessionLocal()
+    session.query(AnalyticsSnapshot).delete()
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _snap(db, days_ago, followers, account_id="acc"):
+    db.add(AnalyticsSnapshot(platform="youtube", account_id=account_id, followers=followers,
+                             views=500, timestamp=datetime.utcnow() - timedelta(days=days_ago)))
+    db.commit()
+
+
+@pytest.mark.parametrize("gap_days", [6.5, 7.5])
+def test_unchanged_account_stays_dormant_across_jittered_weekly_gaps(snap_db, gap_days):
+    _snap(snap_db, gap_days + 0.95, 1000)
+    _snap(snap_db, 0.95, 1000)
+    assert FetchScheduler().classify(snap_db, "youtube", "acc") == "dormant"
+    # a quick follow-up fetch with the same counters must not demote it to daily fetches
+    _snap(snap_db, 0, 1000)
+    assert FetchScheduler().classify(snap_db, "youtube", "acc") == "dormant"
+
+
+def test_growing_account_is_hot_and_slow_one_is_normal(snap_db):
+    _snap(snap_db, 2, 1000, "fast")
+    _snap(snap_db, 0, 1100, "fast")
+    _snap(snap_db, 2, 100000, "slow")
+    _snap(snap_db, 0, 100010, "slow")
+    scheduler = FetchScheduler()
+    assert scheduler.classify(snap_db, "youtube", "fast") == "hot"
+    assert scheduler.classify(snap_db, "youtube", "slow") == "normal"
+    assert scheduler.classify(snap_db, "youtube", "unknown") == "normal"
+
+
+def test_snapshots_without_comparable_metrics_are_not_dormant(snap_db):
+    # failed fetch followed by a real one
+    snap_db.add(AnalyticsSnapshot(platform="youtube", account_id="gap", timestamp=datetime.utcnow() - timedelta(days=2)))
+    snap_db.commit()
+    _snap(snap_db, 0, 1200, "gap")
+    # page whose insights never parse: NULL in both snapshots
+    for days_ago in (2, 0):
+        snap_db.add(AnalyticsSnapshot(platform="facebook", account_id="page",
+                                      timestamp=datetime.utcnow() - timedelta(days=days_ago)))
+    snap_db.commit()
+    scheduler = FetchScheduler()
+    assert scheduler.classify(snap_db, "youtube", "gap") == "normal"
+    assert scheduler.classify(snap_db, "facebook", "page") == "normal"
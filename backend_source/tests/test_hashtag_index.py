@@ -0,0 +1,72 @@
+# backend_source/tests/test_hashtag_index.py
+import gzip
+import json
+from datetime import datetime, timedelta
+from app.db.models import ScheduledPost
+from app.services import ai_engine_v2
+from app.services.hashtag_index import HashtagIndex, keywords, tokenize
+
+
+def _post(db, caption, posted_at, **fields):
+    post = ScheduledPost(platform="instagram", caption=caption, scheduled_time=posted_at,
+                         status="posted", posted_at=posted_at, **fields)
+    db.add(post)
+    db.commit()
+    return post
+
+
+def test_index_and_caption_helpers_share_a_tokenizer():
+    text = "The #Sunset at the beach, sunset vibes! It's a new day"
+    assert tokenize(text) == ["sunset", "beach", "sunset", "vibes", "it's", "day"]
+    assert keywords(text) == ["sunset", "beach", "vibes", "it's", "day"]
+    assert ai_engine_v2._extract_keywords(text, top_n=2) == ["sunset", "beach"]
+
+
+def test_update_advances_the_watermark(db, analytics_db):
+    old = datetime.utcnow() - timedelta(days=3)
+    _post(db, "morning run #fitness", old)
+    last = _post(db, "evening run #running", old)
+    _post(db, "too fresh #pending", datetime.utcnow() - timedelta(hours=1))
+    index = HashtagIndex()
+
+    assert index.update() == 2
+    assert index.watermark == (old.isoformat(), last.id)
+    assert index.update() == 0
+    assert index.posts_indexed == 2
+
+    # same timestamp as the watermark, later id: picked up by the tie-break
+    _post(db, "run club #community", old)
+    assert index.update() == 1
+    assert index.suggest("run") and "#pending" not in index.suggest("run pending")
+
+
+def test_recent_engagement_outranks_older_engagement():
+    index = HashtagIndex()
+    now = datetime.utcnow()
+    index.add_post("coffee #oldfavourite", now - timedelta(days=90), engagement=100)
+    index.add_post("coffee #newfavourite", now - timedelta(days=1), engagement=100)
+    index.add_post("coffee #morebutolder", now - timedelta(days=60), engagement=1000)
+    assert index.suggest("coffee") == ["#newfavourite", "#morebutolder", "#oldfavourite"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "index.json.gz")
+    index = HashtagIndex()
+    index.add_post("latte art #CoffeeTime #barista", datetime.utcnow() - timedelta(days=2), engagement=5)
+    index.watermark = ("2024-01-01T00:00:00", 42)
+    index.save(path)
+
+    loaded = HashtagIndex()
+    assert loaded.load(path)
+    assert loaded.watermark == ("2024-01-01T00:00:00", 42)
+    assert loaded.posts_indexed == 1
+    assert loaded.suggest("latte") == index.suggest("latte") == ["#CoffeeTime", "#barista"]
+    assert loaded.top_tags() == index.top_tags()
+
+
+def test_load_ignores_incompatible_files(tmp_path):
+    path = tmp_path / "index.json.gz"
+    with gzip.open(path, "wt") as f:
+        json.dump({"version": -1}, f)
+    assert not HashtagIndex().load(str(path))
+    assert not HashtagIndex().load(str(tmp_path / "missing.json.gz"))
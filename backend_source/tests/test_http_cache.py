@@ -0,0 +1,18 @@
+# backend_source/tests/test_http_cache.py
+import pytest
+from app.services.http_cache import accepts_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("br;q=0.5, gzip", True),
+    ("gzip, br;q=0", False),
+    ("gzip, br ; q=0.0", False),
+    ("gzip, x-brotli-ish", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("*, br;q=0", False),
+    ("", False),
+])
+def test_accepts_encoding_brotli(header, expected):
+    assert accepts_encoding(header, "br") is expected
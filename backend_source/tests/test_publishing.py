@@ -0,0 +1,147 @@
+# backend_source/tests/test_publishing.py
+import time
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.db.models import ScheduledPost
+from app.services import publishing
+from app.services.publishing import PublishingPool, FakePublisher
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    # no platform throttling unless a test asks for it
+    monkeypatch.setattr(publishing, "DEFAULT_PLATFORM_RATE", 1e6)
+    fake = FakePublisher(latency_ms=0, seed=1)
+    monkeypatch.setattr(publishing, "_default_publisher", fake)
+    return fake
+
+
+def _add_posts(db, n, account_id=None, **fields):
+    past = datetime.utcnow() - timedelta(minutes=1)
+    db.bulk_insert_mappings(ScheduledPost, [
+        dict(platform="test", account_id=account_id, caption=f"post {i}", scheduled_time=past, status="pending", **fields)
+        for i in range(n)
+    ])
+    db.commit()
+
+
+def _posts(db):
+    db.expire_all()
+    return db.query(ScheduledPost).order_by(ScheduledPost.id).all()
+
+
+def _drain(pool):
+    pool.dispatch_due()
+    assert pool.wait_idle(timeout=30)
+
+
+def test_concurrent_dispatchers_publish_each_post_once(db, publisher):
+    _add_posts(db, 600)
+    pools = [PublishingPool(), PublishingPool()]
+    threads = [threading.Thread(target=_drain, args=(p,)) for p in pools]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(publisher.published) == 600
+    assert len(set(publisher.published)) == 600
+    assert {p.status for p in _posts(db)} == {"posted"}
+    assert all(p.claim_token is None for p in _posts(db))
+
+
+def test_account_backlog_is_spread_at_account_rate(db, publisher, monkeypatch):
+    monkeypatch.setattr(publishing, "ACCOUNT_RATE", 10.0)
+    monkeypatch.setattr(publishing, "ACCOUNT_BURST", 2)
+    _add_posts(db, 12, account_id="acc")
+    pool = PublishingPool()
+    woken = []
+    pool.on_requeued(woken.append)
+
+    _drain(pool)
+    posts = _posts(db)
+    deferred = sorted(p.next_attempt_at for p in posts if p.status == "pending")
+    assert sum(p.status == "posted" for p in posts) == 2
+    assert len(deferred) == 10
+    # each deferred post holds its own slot, 1/rate apart, rather than all retrying together
+    gaps = [(b - a).total_seconds() for a, b in zip(deferred, deferred[1:])]
+    assert all(0.05 < g < 0.15 for g in gaps)
+    assert woken and min(woken) == deferred[0]
+
+    time.sleep((deferred[-1] - datetime.utcnow()).total_seconds() + 0.05)
+    _drain(pool)
+    assert {p.status for p in _posts(db)} == {"posted"}
+    assert len(publisher.published) == 12
+
+
+def test_reservations_of_deleted_posts_are_pruned(db, publisher, monkeypatch):
+    monkeypatch.setattr(publishing, "ACCOUNT_RATE", 10.0)
+    monkeypatch.setattr(publishing, "ACCOUNT_BURST", 1)
+    _add_posts(db, 3, account_id="acc")
+    pool = PublishingPool()
+    _drain(pool)
+    assert len(pool._reserved) == 2
+
+    db.query(ScheduledPost).filter(ScheduledPost.status == "pending").delete()
+    db.commit()
+    monkeypatch.setattr(publishing, "PUBLISH_CLAIM_LEASE", 0)
+    time.sleep(0.3)
+    pool.dispatch_due()
+    assert pool._reserved == {}
+
+
+def test_transient_failure_is_retried_with_backoff(db, publisher):
+    publisher.failure_rate = 1.0
+    _add_posts(db, 1)
+    _drain(PublishingPool())
+
+    post = _posts(db)[0]
+    assert post.status == "pending"
+    assert post.attempts == 1
+    assert post.last_error == "fake transient failure"
+    assert post.next_attempt_at > datetime.utcnow()
+    assert post.claim_token is None
+
+
+def test_dead_letter_after_max_attempts_or_permanent_failure(db, publisher):
+    publisher.failure_rate = 1.0
+    _add_posts(db, 1, attempts=publishing.PUBLISH_MAX_ATTEMPTS - 1)
+    _drain(PublishingPool())
+    assert _posts(db)[0].status == "dead_letter"
+
+    db.query(ScheduledPost).delete()
+    db.commit()
+    publisher.failure_rate, publisher.permanent_failure_rate = 0.0, 1.0
+    _add_posts(db, 1)
+    _drain(PublishingPool())
+    post = _posts(db)[0]
+    assert post.status == "dead_letter"
+    assert post.attempts == 1
+
+
+def test_recover_stale_claims_leaves_live_claims_alone(db):
+    now = datetime.utcnow()
+    _add_posts(db, 1, claim_token="live", claimed_at=now)
+    _add_posts(db, 1, claim_token="dead", claimed_at=now - timedelta(hours=1))
+    db.query(ScheduledPost).update({ScheduledPost.status: "publishing"})
+    db.commit()
+
+    assert PublishingPool().recover_stale_claims(lease=600) == 1
+    by_token = {p.claim_token: p.status for p in _posts(db)}
+    assert by_token == {"live": "publishing", None: "pending"}
+
+
+def test_dispatch_failure_counts_as_a_job_failure(monkeypatch):
+    from app.services import background_jobs
+    from app.services.metrics import JOB_FAILURES
+
+    def broken():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(background_jobs.publishing_pool, "dispatch_due", broken)
+    counter = JOB_FAILURES.labels("process_scheduled_posts")
+    before = counter._value.get()
+    with pytest.raises(RuntimeError):
+        background_jobs.process_scheduled_posts()
+    assert counter._value.get() == before + 1
@@ -0,0 +1,74 @@
+# backend_source/tests/test_retention.py
+import gzip
+import json
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.db.models_auth import AnalyticsSnapshot
+from app.main import app
+from app.services import retention
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(retention, "RETENTION_BATCH_PAUSE", 0)
+    return tmp_path
+
+
+def _add(db, ts, followers, raw=None, account="acc"):
+    db.add(AnalyticsSnapshot(platform="youtube", account_id=account, followers=followers, raw=raw, timestamp=ts))
+    db.commit()
+
+
+def _archived(archive_dir, day, reason):
+    with gzip.open(archive_dir / "analytics_snapshots" / f"date={day}" / f"{reason}.ndjson.gz", "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_expire_archives_then_deletes(analytics_db, archive_dir, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_BATCH_SIZE", 2)
+    for h in range(3):
+        _add(analytics_db, datetime(2020, 1, 1, h), h, raw={"h": h})
+    _add(analytics_db, datetime(2024, 1, 1), 99)
+    assert retention.expire_old(analytics_db, datetime(2021, 1, 1)) == 3
+    assert [r.followers for r in analytics_db.query(AnalyticsSnapshot)] == [99]
+    rows = _archived(archive_dir, "2020-01-01", "expired")
+    assert [(r["followers"], r["raw"], r["timestamp"]) for r in rows] == [
+        (0, {"h": 0}, "2020-01-01T00:00:00"), (1, {"h": 1}, "2020-01-01T01:00:00"), (2, {"h": 2}, "2020-01-01T02:00:00"),
+    ]
+
+
+def test_downsample_keeps_last_per_day_and_compacts_it(analytics_db, archive_dir):
+    for h in (8, 12, 20):
+        _add(analytics_db, datetime(2023, 3, 1, h), h, raw={"h": h})
+    _add(analytics_db, datetime(2023, 3, 2, 9), 1)                 # single row, no payload: nothing to do
+    _add(analytics_db, datetime(2023, 3, 3, 9), 2, raw={"h": 9})   # single row with payload: compact only
+    result = retention.downsample(analytics_db, datetime(2023, 1, 1), datetime(2023, 6, 1))
+    assert result == {"downsampled": 2, "compacted": 2}
+    kept = analytics_db.query(AnalyticsSnapshot).order_by(AnalyticsSnapshot.timestamp).all()
+    assert [(r.timestamp.day, r.followers, r.raw) for r in kept] == [(1, 20, None), (2, 1, None), (3, 2, None)]
+    assert sorted(r["followers"] for r in _archived(archive_dir, "2023-03-01", "downsampled")) == [8, 12]
+    assert [r["raw"] for r in _archived(archive_dir, "2023-03-01", "compacted")] == [{"h": 20}]
+    # already reduced history has nothing left to do
+    assert retention.downsample(analytics_db, datetime(2023, 1, 1), datetime(2023, 6, 1)) == {"downsampled": 0, "compacted": 0}
+
+
+def test_downsample_respects_the_window_start(analytics_db):
+    _add(analytics_db, datetime(2023, 3, 1, 1), 1)
+    _add(analytics_db, datetime(2023, 3, 1, 20), 2)
+    _add(analytics_db, datetime(2023, 3, 1, 22), 3)
+    retention.downsample(analytics_db, datetime(2023, 3, 1, 12), datetime(2023, 6, 1))
+    assert sorted(r.followers for r in analytics_db.query(AnalyticsSnapshot)) == [1, 3]
+
+
+def test_compaction_changes_the_history_etag(analytics_db):
+    _add(analytics_db, datetime.utcnow(), 5, raw={"big": "payload"})
+    client = TestClient(app)
+    first = client.get("/analytics/youtube/history")
+    assert first.json()[0]["raw"] == {"big": "payload"}
+    analytics_db.query(AnalyticsSnapshot).update({AnalyticsSnapshot.raw: retention.null()})
+    analytics_db.commit()
+    second = client.get("/analytics/youtube/history", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.json()[0]["raw"] is None
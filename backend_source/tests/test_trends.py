@@ -0,0 +1,45 @@
+# backend_source/tests/test_trends.py
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import trends
+from app.services.trends import spike_scores, SPIKE_Z
+
+
+def test_jump_out_of_a_steady_trend_is_a_spike():
+    # +10/day for 40 days, then +500 in one day
+    series = np.cumsum(np.r_[0, np.full(40, 10.0), 500, np.full(5, 10.0)])[None, :]
+    z = spike_scores(series, 28)[0]
+    assert z[41] >= SPIKE_Z
+    assert np.nanmax(np.abs(z[:41])) < SPIKE_Z
+
+
+def test_jump_out_of_a_flat_series_is_a_spike_but_small_moves_are_not():
+    flat = np.full(40, 1000.0)
+    jump = flat.copy()
+    jump[35:] += 50
+    wiggle = flat.copy()
+    wiggle[35:] += 1
+    z = spike_scores(np.vstack([flat, jump, wiggle]), 28)
+    assert np.nanmax(np.abs(z[0])) == 0
+    assert z[1, 35] >= SPIKE_Z
+    assert np.nanmax(np.abs(z[2])) < SPIKE_Z
+
+
+def test_scores_are_nan_without_history():
+    z = spike_scores(np.array([[1.0, np.nan, np.nan]]), 28)
+    assert np.isnan(z).all()
+
+
+def test_cache_keeps_only_recent_keys(analytics_db, monkeypatch):
+    monkeypatch.setattr(trends, "_cache", trends.OrderedDict())
+    monkeypatch.setattr(trends, "TRENDS_CACHE_KEYS", 2)
+    for days in (7, 14, 7, 30):
+        trends.account_trends(analytics_db, "youtube", "followers", days)
+    assert [k[2] for k in trends._cache] == [7, 30]
+
+
+def test_trends_route_rejects_unknown_platforms(analytics_db):
+    client = TestClient(app)
+    assert client.get("/analytics/myspace/trends").status_code == 404
+    assert client.get("/analytics/youtube/trends").status_code == 200